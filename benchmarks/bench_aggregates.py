@@ -0,0 +1,95 @@
+"""EDA charts from raw rows vs from materialised aggregates.
+
+A synthetic dataset of each size is written to a temporary directory, then
+the ten EDA figures are built both ways. "materialise" is the one-off cost
+per dataset version; "from aggregates" is what every rerun pays:
+
+    python -m benchmarks.bench_aggregates --sizes 10000 100000 1000000
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+import plotly.express as px
+
+from climate_pipeline import charts, store
+from climate_pipeline.aggregates import AggregateStore
+from climate_pipeline.mock_server import CATEGORIES
+
+
+def synthetic_dataset(n, seed=42):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "id": np.char.add("EONET_", np.arange(n).astype(str)),
+        "category": rng.choice([c[1] for c in CATEGORIES], n),
+        "date": pd.Timestamp("2024-01-01", tz="UTC") + pd.to_timedelta(rng.integers(0, 365 * 24, n), unit="h"),
+        "latitude": rng.uniform(-60, 70, n).astype(np.float32),
+        "longitude": rng.uniform(-180, 180, n).astype(np.float32),
+        "temp": rng.normal(18, 9, n),
+        "humidity": rng.uniform(10, 95, n),
+        "wind": rng.gamma(2.0, 1.5, n),
+        "precip": rng.exponential(2.0, n)
+    })
+
+
+def from_rows(df):
+    return [
+        px.histogram(df, x="temp"),
+        px.scatter(df, x="temp", y="wind", color="category"),
+        px.violin(df, x="category", y="temp"),
+        px.imshow(df[["temp", "humidity", "wind", "precip"]].corr()),
+        px.histogram(df, x="precip"),
+        px.box(df, x="category", y="humidity"),
+        px.histogram(df, x="category"),
+        px.box(df, x="category", y="precip"),
+        px.histogram(df, x=df["date"].dt.month),
+        px.histogram(df, x="wind")
+    ]
+
+
+def from_aggregates(a):
+    return [
+        charts.histogram(a, "temp"),
+        charts.binned_scatter(a),
+        charts.violin(a, "temp"),
+        charts.correlation(a),
+        charts.histogram(a, "precip"),
+        charts.box(a, "humidity"),
+        charts.category_counts(a),
+        charts.box(a, "precip"),
+        charts.monthly_counts(a),
+        charts.histogram(a, "wind")
+    ]
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000, 1000000])
+    args = parser.parse_args()
+
+    for n in args.sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "dataset")
+            store.write_dataset(synthetic_dataset(n), path)
+            aggregate_store = AggregateStore(os.path.join(tmp, "aggregates.sqlite"))
+
+            _, raw = timed(lambda: from_rows(store.read_dataset(path)))
+            _, build = timed(aggregate_store.load, path)
+            aggregates, _ = timed(aggregate_store.load, path)
+            _, live = timed(from_aggregates, aggregates)
+            aggregate_store.close()
+        print("%8d rows  raw rows %7.3f s  materialise %7.3f s  from aggregates %7.3f s"
+              % (n, raw, build, live))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""Climatology baselines: build cost per cell and z-score lookup cost per event.
+
+Baselines for ``--cells`` grid cells are fetched from the mock POWER
+server, then rebuilt from the saved file to show nothing is refetched.
+Anomaly lookups over synthetic events are checked against a pandas merge
+on (cell, day of year) before being timed:
+
+    python -m benchmarks.bench_climatology --cells 20 --sizes 10000 100000 1000000
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from climate_pipeline import mock_server
+from climate_pipeline.climatology import DAYS, day_of_year, ensure_climatology
+from climate_pipeline.enrich import VARIABLES
+from climate_pipeline.planner import grid_cells
+
+
+def merge_lookup(climatology, lat, lon, days, values):
+    table = pd.DataFrame({
+        "cell": np.repeat(climatology.cells, DAYS),
+        "doy": np.tile(np.arange(DAYS), len(climatology)),
+        **{"mean_" + v: climatology.mean[:, :, j].ravel() for j, v in enumerate(VARIABLES)},
+        **{"std_" + v: climatology.std[:, :, j].ravel() for j, v in enumerate(VARIABLES)}
+    })
+    events = pd.DataFrame({"cell": grid_cells(lat, lon), "doy": day_of_year(days)})
+    joined = events.merge(table, on=["cell", "doy"], how="left")
+    mean = joined[["mean_" + v for v in VARIABLES]].to_numpy()
+    std = joined[["std_" + v for v in VARIABLES]].to_numpy()
+    return (values - mean) / std
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--cells", type=int, default=20)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(42)
+    cell_lat = rng.uniform(-60, 70, args.cells)
+    cell_lon = rng.uniform(-180, 180, args.cells)
+    server = mock_server.serve()
+    options = {"url": server.base_url + mock_server.POWER_PATH, "rate_per_host": 0}
+    with tempfile.TemporaryDirectory() as path:
+        path = os.path.join(path, "climatology.npz")
+        for label in ("first build", "reuse"):
+            start = time.perf_counter()
+            climatology = ensure_climatology(cell_lat, cell_lon, path, **options)
+            print("%s: %d cells in %.3f s (%.1f KiB on disk)" % (
+                label, len(climatology), time.perf_counter() - start, os.path.getsize(path) / 1024
+            ))
+
+    for n in args.sizes:
+        pick = rng.integers(0, args.cells, n)
+        lat, lon = cell_lat[pick], cell_lon[pick]
+        days = np.datetime64("2015-01-01") + rng.integers(0, 3650, n).astype("timedelta64[D]")
+        values = rng.normal(15, 10, (n, len(VARIABLES)))
+
+        start = time.perf_counter()
+        _, z = climatology.anomalies(lat, lon, days, values)
+        vectorised = time.perf_counter() - start
+        start = time.perf_counter()
+        expected = merge_lookup(climatology, lat, lon, days, values)
+        merged = time.perf_counter() - start
+        assert np.allclose(z, expected, equal_nan=True, rtol=1e-5)
+        print("%8d events: lookup %.4f s (%.0f ns/event), pandas merge %.4f s, %.1fx" % (
+            n, vectorised, 1e9 * vectorised / n, merged, merged / vectorised
+        ))
+
+
+if __name__ == "__main__":
+    main()
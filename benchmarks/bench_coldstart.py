@@ -0,0 +1,63 @@
+"""Where a cold start spends its time: EONET sync plus a full dataset build.
+
+Runs against the mock NASA server with empty stores and prints the stage
+timings, counters and peak RSS that ``climate_pipeline.metrics`` recorded,
+optionally exporting them as JSON. Add ``CLIMATE_PROFILE=power.fetch`` to
+also write a cProfile of that stage to ``data/profiles``:
+
+    python -m benchmarks.bench_coldstart --events 1000 --latency 0.05 --json coldstart.json
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from climate_pipeline import metrics, mock_server
+from climate_pipeline.cache import ClimateCache
+from climate_pipeline.eonet import EventStore, sync_events
+from climate_pipeline.fetch import API_BASE_ENV
+from climate_pipeline.pipeline import build_dataset
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--events", type=int, default=1000)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--workers", type=int, default=16)
+    parser.add_argument("--json", help="also write the snapshot to this file")
+    args = parser.parse_args()
+
+    server = mock_server.serve(latency=args.latency, error_rate=args.error_rate, events=args.events)
+    os.environ[API_BASE_ENV] = server.base_url
+    with tempfile.TemporaryDirectory() as path:
+        event_store = EventStore(os.path.join(path, "events.sqlite"))
+        cache = ClimateCache(os.path.join(path, "cache.sqlite"))
+        metrics.reset()
+        start = time.perf_counter()
+        sync_events(event_store)
+        summary = build_dataset(event_store, os.path.join(path, "dataset"), cache=cache,
+                                max_workers=args.workers, rate_per_host=0)
+        elapsed = time.perf_counter() - start
+    os.environ.pop(API_BASE_ENV)
+    server.shutdown()
+
+    snap = metrics.snapshot()
+    print("cold start: %d events -> %d rows in %.2f s, peak RSS %.0f MiB" % (
+        summary["events"], summary["rows"], elapsed, snap["peak_rss_mb"] or 0
+    ))
+    print("%-16s %6s %9s %9s %9s" % ("stage", "calls", "wall s", "cpu s", "share"))
+    for row in metrics.stage_rows(snap):
+        print("%-16s %6d %9.3f %9.3f %8.0f%%" % (
+            row["stage"], row["calls"], row["wall_s"], row["cpu_s"], 100 * row["wall_s"] / elapsed
+        ))
+    for name, value in sorted(snap["counters"].items()):
+        print("%-16s %d" % (name, value))
+    for profile in snap["profiles"]:
+        print("profile written to", profile)
+    if args.json:
+        metrics.export_json(args.json)
+
+
+if __name__ == "__main__":
+    main()
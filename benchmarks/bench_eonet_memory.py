@@ -0,0 +1,74 @@
+"""Peak memory of EONET ingestion: json.load + row list vs streaming parser.
+
+    python -m benchmarks.bench_eonet_memory --events 100000
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+import tracemalloc
+
+import pandas as pd
+
+from climate_pipeline.eonet import events_frame, iter_events
+from climate_pipeline.mock_server import synthetic_events, write_events
+
+
+def materialised(path):
+    # the notebook's original path: whole tree, then a list of dicts, then the frame
+    with open(path) as f:
+        data = json.load(f)
+    rows = []
+    for event in data["events"]:
+        if event["geometry"]:
+            geom = event["geometry"][-1]
+            rows.append({
+                "id": event["id"],
+                "title": event["title"],
+                "category": event["categories"][0]["title"],
+                "date": geom["date"],
+                "longitude": geom["coordinates"][0],
+                "latitude": geom["coordinates"][1],
+                "source": event["sources"][0]["url"]})
+    return pd.DataFrame(rows)
+
+
+def streamed(path):
+    def chunks():
+        with open(path, "rb") as f:
+            while True:
+                chunk = f.read(1 << 16)
+                if not chunk:
+                    return
+                yield chunk
+    return events_frame(iter_events(chunks()))
+
+
+def measure(fn, path):
+    tracemalloc.start()
+    start = time.perf_counter()
+    frame = fn(path)
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return frame, peak, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--events", type=int, default=100_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "events.json")
+        write_events(path, synthetic_events(args.events, max_track=3))
+        print("%d events, %.1f MB on disk" % (args.events, os.path.getsize(path) / 1e6))
+        for label, fn in (("materialised", materialised), ("streamed", streamed)):
+            frame, peak, elapsed = measure(fn, path)
+            print("%-13s peak %7.1f MB  frame %6.1f MB  %5.2f s"
+                  % (label, peak / 1e6, frame.memory_usage(deep=True).sum() / 1e6, elapsed))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""Serial vs concurrent POWER fetching against the local mock server.
+
+    python -m benchmarks.bench_fetch --events 200 --latency 0.05 --workers 16
+"""
+import argparse
+import random
+import time
+
+from climate_pipeline import mock_server
+from climate_pipeline.fetch import Fetcher
+from climate_pipeline.power import POWER_URL, fetch_power
+
+
+def sample_points(n, seed=42):
+    rng = random.Random(seed)
+    points = []
+    for _ in range(n):
+        day = "2025%02d%02d" % (rng.randint(1, 12), rng.randint(1, 28))
+        points.append((rng.uniform(-60, 70), rng.uniform(-180, 180), day, day))
+    return points
+
+
+def run(points, url, workers, rate):
+    with Fetcher(max_workers=workers, rate_per_host=rate) as fetcher:
+        start = time.perf_counter()
+        results = fetch_power(points, fetcher=fetcher, url=url)
+        elapsed = time.perf_counter() - start
+    failed = sum(r is None for r in results)
+    return len(points) / elapsed, elapsed, failed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--events", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.05, help="mock server delay per request (s)")
+    parser.add_argument("--workers", type=int, default=16)
+    parser.add_argument("--rate", type=float, default=0, help="per-host limit (req/s), 0 = unlimited")
+    args = parser.parse_args()
+
+    server = mock_server.serve(latency=args.latency)
+    url = server.base_url + mock_server.POWER_PATH
+    points = sample_points(args.events)
+    try:
+        print("%d events, %.0f ms simulated latency (real endpoint: %s)"
+              % (args.events, args.latency * 1000, POWER_URL))
+        for label, workers in (("serial", 1), ("concurrent", args.workers)):
+            rate, elapsed, failed = run(points, url, workers, args.rate)
+            print("%-11s workers=%-3d %8.1f events/s  %6.2f s  failed=%d"
+                  % (label, workers, rate, elapsed, failed))
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""Time to first paint of the Streamlit apps, and what each page costs after it.
+
+Each app runs in a fresh interpreter through Streamlit's AppTest harness,
+from an empty working directory and against the mock NASA server, so the
+first run pays every import and any dataset build the opening page
+triggers; "loaded" lists the heavy libraries the app itself imported
+(Streamlit brings some along on its own). The dashboard's other pages
+are then opened in order; the first data page is the one that builds
+the dataset:
+
+    python -m benchmarks.bench_first_paint --events 300
+    python -m benchmarks.bench_first_paint --apps main.py
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+from climate_pipeline import mock_server
+from climate_pipeline.fetch import API_BASE_ENV
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APPS = ["import streamlit as st.py", "main.py"]
+HEAVY = ["pandas", "pyarrow", "plotly", "sklearn"]
+
+CHILD = """
+import json, sys, time
+start = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+harness = time.perf_counter() - start
+preloaded = set(sys.modules)
+at = AppTest.from_file(sys.argv[1], default_timeout=600)
+start = time.perf_counter()
+at.run()
+out = {"harness_s": harness, "first_paint_s": time.perf_counter() - start,
+       "loaded": [m for m in json.loads(sys.argv[2]) if m in sys.modules and m not in preloaded], "pages": []}
+if at.sidebar.radio:
+    for page in at.sidebar.radio[0].options[1:]:
+        start = time.perf_counter()
+        at.sidebar.radio[0].set_value(page).run()
+        out["pages"].append((page, time.perf_counter() - start))
+print(json.dumps(out))
+"""
+
+
+def measure(app, env):
+    with tempfile.TemporaryDirectory() as path:
+        os.symlink(os.path.join(ROOT, "images"), os.path.join(path, "images"))
+        result = subprocess.run(
+            [sys.executable, "-c", CHILD, os.path.abspath(app), json.dumps(HEAVY)],
+            cwd=path, env=env, capture_output=True, text=True, check=True
+        )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--apps", nargs="+", default=[os.path.join(ROOT, app) for app in APPS])
+    parser.add_argument("--events", type=int, default=300)
+    parser.add_argument("--latency", type=float, default=0.0)
+    args = parser.parse_args()
+
+    server = mock_server.serve(latency=args.latency, events=args.events)
+    env = dict(os.environ, PYTHONPATH=ROOT, **{API_BASE_ENV: server.base_url})
+    for app in args.apps:
+        out = measure(app, env)
+        loaded = ", ".join(out["loaded"]) or "none of " + "/".join(HEAVY)
+        print("%s: first paint %.2f s (harness import %.2f s), loaded: %s" % (
+            os.path.basename(app), out["first_paint_s"], out["harness_s"], loaded
+        ))
+        for page, seconds in out["pages"]:
+            print("  %-22s %.2f s" % (page, seconds))
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+"""Raw-point scatter_geo vs the hex-binned map.
+
+For each size the figure is built both ways and serialised the way
+Streamlit ships it to the browser; payload is the JSON size and time
+covers binning, figure construction and serialisation:
+
+    python -m benchmarks.bench_geobin --sizes 10000 100000 1000000 --zoom 2
+"""
+import argparse
+import time
+
+import plotly.express as px
+
+from benchmarks.bench_aggregates import synthetic_dataset
+from climate_pipeline import charts
+from climate_pipeline.geobin import bin_points
+
+
+def raw(df, zoom):
+    return px.scatter_geo(df, lat="latitude", lon="longitude", color="category"), len(df)
+
+
+def binned(df, zoom):
+    cells = bin_points(df, zoom)
+    return charts.hex_map(cells), len(cells)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000, 1000000])
+    parser.add_argument("--zoom", type=int, default=2)
+    args = parser.parse_args()
+
+    for n in args.sizes:
+        df = synthetic_dataset(n)[["category", "latitude", "longitude"]]
+        line = "%8d events" % n
+        for label, fn in (("raw", raw), ("hex", binned)):
+            start = time.perf_counter()
+            fig, markers = fn(df, args.zoom)
+            payload = len(fig.to_json())
+            elapsed = time.perf_counter() - start
+            line += "  %s %8d markers %9.1f KB %7.3f s" % (label, markers, payload / 1024, elapsed)
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,37 @@
+"""Full fit vs incremental update vs cached load of the Models tab bundle.
+
+The second pass adds 1% new events, so the incremental models only see
+those rows; the third pass trains on identical data and loads from disk:
+
+    python -m benchmarks.bench_models --events 100000
+"""
+import argparse
+import tempfile
+import time
+
+import pandas as pd
+
+from benchmarks.bench_aggregates import synthetic_dataset
+from climate_pipeline.models import train_models
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--events", type=int, default=100_000)
+    args = parser.parse_args()
+
+    frame = synthetic_dataset(int(args.events * 1.01))
+    base = frame.iloc[:args.events]
+    with tempfile.TemporaryDirectory() as path:
+        for label, data in (("first fit", base), ("+1% events", frame), ("same data", frame)):
+            start = time.perf_counter()
+            bundle = train_models(data, path)
+            total = time.perf_counter() - start
+            print("%s: %.3f s total" % (label, total))
+            report = pd.DataFrame(bundle["report"])[["model", "mode", "rows", "fit_s", "rows_per_s"]]
+            print(report.to_string(index=False, formatters={"fit_s": "{:.3f}".format, "rows_per_s": "{:,.0f}".format}))
+            print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""Requests planned per grid cell vs the one-request-per-event loop.
+
+Generates a wildfire-heavy synthetic pull (events clustered around a few
+hotspots over a fire season) and fetches it from the local mock server:
+
+    python -m benchmarks.bench_planner --events 2000 --hotspots 25
+"""
+import argparse
+import random
+import time
+from datetime import datetime, timedelta
+
+from climate_pipeline import mock_server
+from climate_pipeline.fetch import Fetcher
+from climate_pipeline.planner import fetch_planned
+from climate_pipeline.power import fetch_power
+
+
+def wildfire_points(n, hotspots, window_days=3, seed=42):
+    rng = random.Random(seed)
+    centres = [(rng.uniform(-40, 60), rng.uniform(-170, 170)) for _ in range(hotspots)]
+    season = datetime(2025, 6, 1)
+    points = []
+    for _ in range(n):
+        lat, lon = rng.choice(centres)
+        day = season + timedelta(days=rng.randint(0, 60))
+        points.append((
+            lat + rng.gauss(0, 0.3), lon + rng.gauss(0, 0.3),
+            (day - timedelta(days=window_days)).strftime("%Y%m%d"), day.strftime("%Y%m%d")
+        ))
+    return points
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--events", type=int, default=2000)
+    parser.add_argument("--hotspots", type=int, default=25)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--workers", type=int, default=16)
+    args = parser.parse_args()
+
+    server = mock_server.serve(latency=args.latency)
+    url = server.base_url + mock_server.POWER_PATH
+    points = wildfire_points(args.events, args.hotspots)
+    try:
+        with Fetcher(max_workers=args.workers, rate_per_host=0) as fetcher:
+            start = time.perf_counter()
+            fetch_power(points, fetcher=fetcher, url=url)
+            naive = time.perf_counter() - start
+
+            start = time.perf_counter()
+            _, report = fetch_planned(points, fetcher=fetcher, url=url)
+            planned = time.perf_counter() - start
+    finally:
+        server.shutdown()
+
+    print("events:            %d" % report["events"])
+    print("grid cells:        %d" % report["grid_cells"])
+    print("naive requests:    %d  (%.2f s)" % (report["naive_requests"], naive))
+    print("planned requests:  %d  (%.2f s)" % (report["planned_requests"], planned))
+    print("reduction:         %.1fx" % report["reduction"])
+
+
+if __name__ == "__main__":
+    main()
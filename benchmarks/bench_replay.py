@@ -0,0 +1,67 @@
+"""Reproducible pipeline runs: live (mock) vs recorded replay vs injected errors.
+
+Syncs EONET and builds the dataset three times against the mock NASA
+server: once recording every response, once replaying the archive with
+the server stopped, and once with the server serving the archive while
+failing ``--error-rate`` of requests. All three datasets must match:
+
+    python -m benchmarks.bench_replay --events 500 --latency 0.05 --error-rate 0.2
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from climate_pipeline import mock_server, store
+from climate_pipeline.eonet import EventStore, sync_events
+from climate_pipeline.fetch import API_BASE_ENV
+from climate_pipeline.pipeline import build_dataset
+from climate_pipeline.replay import ARCHIVE_ENV, MODE_ENV, shared_archive
+
+
+def run(path, name, **env):
+    for key in (API_BASE_ENV, MODE_ENV):
+        os.environ.pop(key, None)
+    os.environ.update(env)
+    event_store = EventStore(os.path.join(path, name + ".sqlite"))
+    start = time.perf_counter()
+    synced = sync_events(event_store)
+    summary = build_dataset(event_store, os.path.join(path, name), max_workers=16, rate_per_host=0)
+    elapsed = time.perf_counter() - start
+    print("%-8s %5d events  %5d rows  %7.2f s" % (name, synced["fetched"], summary["rows"], elapsed))
+    frame = store.read_dataset(os.path.join(path, name))
+    return frame.sort_values("id").reset_index(drop=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--events", type=int, default=500)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--error-rate", type=float, default=0.2)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as path:
+        os.environ[ARCHIVE_ENV] = os.path.join(path, "replay.sqlite")
+        server = mock_server.serve(latency=args.latency, events=args.events)
+        recorded = run(path, "record", **{API_BASE_ENV: server.base_url, MODE_ENV: "record"})
+        server.shutdown()
+        server.server_close()
+        stats = shared_archive().stats()
+        print("archive: %d responses, %.1f KiB -> %.1f KiB compressed" % (
+            stats["responses"], stats["raw_bytes"] / 1024, stats["stored_bytes"] / 1024
+        ))
+
+        replayed = run(path, "replay", **{MODE_ENV: "replay"})
+
+        server = mock_server.serve(latency=args.latency, error_rate=args.error_rate, archive=shared_archive())
+        flaky = run(path, "errors", **{API_BASE_ENV: server.base_url})
+        server.shutdown()
+
+        for key in (API_BASE_ENV, MODE_ENV, ARCHIVE_ENV):
+            os.environ.pop(key, None)
+        assert recorded.equals(replayed) and recorded.equals(flaky)
+        print("all three datasets identical")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""Load test of the scoring API at batch sizes 1, 100 and 10k.
+
+Trains a bundle on synthetic events, starts the HTTP service and reports
+p50/p99 latency, requests/s and rows/s per batch size, in-process and
+over HTTP with ``--clients`` concurrent keep-alive connections, both as
+JSON and as binary ``.npy`` bodies.
+``--locations`` scores (lat, lon, date) batches through a warmed POWER
+cache served by the mock server instead of raw climate vectors:
+
+    python -m benchmarks.bench_scoring --requests 200 --clients 4
+"""
+import argparse
+import io
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from benchmarks.bench_aggregates import synthetic_dataset
+from climate_pipeline import mock_server
+from climate_pipeline.cache import ClimateCache
+from climate_pipeline.enrich import VARIABLES
+from climate_pipeline.fetch import make_session
+from climate_pipeline.models import train_models
+from climate_pipeline.scoring import NPY_TYPE, SCORE_PATH, Scorer, serve
+
+
+def payloads(frame, size, count, locations, seed=0):
+    rng = np.random.default_rng(seed)
+    bodies = []
+    for _ in range(count):
+        rows = frame.iloc[rng.integers(0, len(frame), size)]
+        if locations:
+            bodies.append({"locations": [
+                {"lat": lat, "lon": lon, "date": day}
+                for lat, lon, day in zip(
+                    rows["latitude"].astype(float).tolist(), rows["longitude"].astype(float).tolist(),
+                    rows["date"].dt.strftime("%Y-%m-%d")
+                )
+            ]})
+        else:
+            bodies.append({"vectors": rows[VARIABLES].to_numpy().tolist()})
+    return bodies
+
+
+def npy(array):
+    buffer = io.BytesIO()
+    np.save(buffer, array)
+    return buffer.getvalue()
+
+
+def report(label, size, latencies, elapsed):
+    latencies = 1000 * np.asarray(latencies)
+    print("%-10s batch %6d: p50 %8.2f ms  p99 %8.2f ms  %8.1f req/s  %12s rows/s" % (
+        label, size, np.percentile(latencies, 50), np.percentile(latencies, 99),
+        len(latencies) / elapsed, "{:,.0f}".format(size * len(latencies) / elapsed)
+    ))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--events", type=int, default=50_000)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 100, 10_000])
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--clients", type=int, default=4)
+    parser.add_argument("--locations", action="store_true")
+    args = parser.parse_args()
+
+    frame = synthetic_dataset(args.events)
+    with tempfile.TemporaryDirectory() as path:
+        bundle = train_models(frame, os.path.join(path, "models"))
+        options = {}
+        if args.locations:
+            power = mock_server.serve()
+            options = {
+                "cache": ClimateCache(os.path.join(path, "climate.sqlite")),
+                "url": power.base_url + mock_server.POWER_PATH, "rate_per_host": 0
+            }
+        scorer = Scorer(bundle, **options)
+        server = serve(scorer)
+        url = server.base_url + SCORE_PATH
+        print("scoring %s with bundle %s" % ("locations" if args.locations else "climate vectors", bundle["key"]))
+
+        for size in args.sizes:
+            count = max(args.clients, min(args.requests, 2_000_000 // size))
+            bodies = payloads(frame, size, count, args.locations)
+            if args.locations:
+                for body in bodies:  # warm the climate cache so only lookups are timed
+                    scorer.score(body)
+
+            latencies = []
+            start = time.perf_counter()
+            for body in bodies:
+                t = time.perf_counter()
+                scorer.score(body)
+                latencies.append(time.perf_counter() - t)
+            report("in-process", size, latencies, time.perf_counter() - start)
+
+            local = threading.local()
+
+            def post(body):
+                if not hasattr(local, "session"):
+                    local.session = make_session(1)  # one keep-alive connection per client
+                t = time.perf_counter()
+                if isinstance(body, dict):
+                    response = local.session.post(url, json=body, timeout=60)
+                    response.raise_for_status()
+                    response.json()
+                else:
+                    response = local.session.post(url, data=body, headers={"Content-Type": NPY_TYPE}, timeout=60)
+                    response.raise_for_status()
+                    np.load(io.BytesIO(response.content))
+                return time.perf_counter() - t
+
+            formats = [("json", bodies)]
+            if not args.locations:
+                formats.append(("npy", [npy(np.asarray(b["vectors"], dtype=np.float32)) for b in bodies]))
+            for name, encoded in formats:
+                start = time.perf_counter()
+                with ThreadPoolExecutor(args.clients) as pool:
+                    latencies = list(pool.map(post, encoded))
+                report("%s x%d" % (name, args.clients), size, latencies, time.perf_counter() - start)
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
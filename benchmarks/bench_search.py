@@ -0,0 +1,37 @@
+"""Scaling of the cross-validated hyperparameter search with worker count.
+
+Runs the same grid with each ``--workers`` value and reports wall time,
+speedup over the first value and parallel efficiency:
+
+    python -m benchmarks.bench_search --events 100000 --workers 1 2 4 8 16 32
+"""
+import argparse
+import os
+
+from benchmarks.bench_aggregates import synthetic_dataset
+from climate_pipeline.search import run_search
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--events", type=int, default=100_000)
+    parser.add_argument("--folds", type=int, default=5)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, os.cpu_count()])
+    args = parser.parse_args()
+
+    frame = synthetic_dataset(args.events)
+    print("%d cores available" % os.cpu_count())
+    base = None
+    for workers in args.workers:
+        leaderboard, summary = run_search(frame, workers, args.folds)
+        base = base or summary["elapsed_s"]
+        print("%2d workers: %7.2f s  speedup %5.2fx  efficiency %3.0f%%  (%d jobs, cpu %.1f s)" % (
+            workers, summary["elapsed_s"], base / summary["elapsed_s"],
+            100 * summary["efficiency"], summary["jobs"], summary["job_cpu_s"]
+        ))
+    best = leaderboard.iloc[0]
+    print("best: %s %s  balanced accuracy %.3f" % (best["model"], best["params"], best["balanced_accuracy"]))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""Spatial index vs brute-force scans for region queries.
+
+Points are uniform on the sphere; every query is checked against the
+brute-force answer before it is timed:
+
+    python -m benchmarks.bench_spatial --points 1000000 --queries 200
+"""
+import argparse
+import time
+
+import numpy as np
+
+from climate_pipeline.spatial import SpatialIndex
+from climate_pipeline.tracks import haversine_km
+
+
+def brute_radius(lat, lon, qlat, qlon, km):
+    return np.flatnonzero(haversine_km(qlat, qlon, lat, lon) <= km)
+
+
+def brute_bbox(lat, lon, south, west, north, east):
+    return np.flatnonzero((lat >= south) & (lat <= north) & (lon >= west) & (lon <= east))
+
+
+def brute_nearest(lat, lon, qlat, qlon, k):
+    dist = haversine_km(qlat, qlon, lat, lon)
+    return np.argpartition(dist, k)[:k]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--points", type=int, default=1_000_000)
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(42)
+    lat = np.degrees(np.arcsin(rng.uniform(-1, 1, args.points)))
+    lon = rng.uniform(-180, 180, args.points)
+    ids = np.arange(args.points).astype(str)
+
+    start = time.perf_counter()
+    index = SpatialIndex(ids, lat, lon)
+    print("%d points, index built in %.3f s" % (args.points, time.perf_counter() - start))
+
+    centres = np.column_stack([
+        np.degrees(np.arcsin(rng.uniform(-0.95, 0.95, args.queries))),
+        rng.uniform(-170, 170, args.queries)
+    ])
+    queries = {
+        "radius 100 km": (
+            lambda q: index.radius(q[0], q[1], 100)[0],
+            lambda q: brute_radius(lat, lon, q[0], q[1], 100)
+        ),
+        "radius 1000 km": (
+            lambda q: index.radius(q[0], q[1], 1000)[0],
+            lambda q: brute_radius(lat, lon, q[0], q[1], 1000)
+        ),
+        "bbox 5x5 deg": (
+            lambda q: index.bbox(q[0], q[1], q[0] + 5, q[1] + 5),
+            lambda q: brute_bbox(lat, lon, q[0], q[1], q[0] + 5, q[1] + 5)
+        ),
+        "nearest 10": (
+            lambda q: index.nearest(q[0], q[1], 10)[0],
+            lambda q: brute_nearest(lat, lon, q[0], q[1], 10)
+        )
+    }
+    for label, (indexed, brute) in queries.items():
+        for q in centres[:10]:
+            assert set(indexed(q)) == set(ids[brute(q)]), label
+        timings = []
+        for fn in (indexed, brute):
+            start = time.perf_counter()
+            for q in centres:
+                fn(q)
+            timings.append((time.perf_counter() - start) / len(centres) * 1000)
+        print("%-15s indexed %8.3f ms  brute force %8.3f ms  speedup %7.0fx"
+              % (label, timings[0], timings[1], timings[1] / timings[0]))
+
+
+if __name__ == "__main__":
+    main()
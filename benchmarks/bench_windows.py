@@ -0,0 +1,53 @@
+"""One-pass multi-window features vs one POWER fetch per window.
+
+Both sides compute the default 1/3/7/30-day feature set against the mock
+POWER server: once from a single fetch of the longest window, and once
+with a separate fetch per window length. Results are checked to match:
+
+    python -m benchmarks.bench_windows --events 500 --latency 0.05
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from climate_pipeline import mock_server
+from climate_pipeline.enrich import DEFAULT_FEATURES, enrich_events
+from climate_pipeline.eonet import events_frame
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--events", type=int, default=500)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--workers", type=int, default=16)
+    args = parser.parse_args()
+
+    events = events_frame(mock_server.synthetic_events(args.events))
+    server = mock_server.serve(latency=args.latency)
+    options = {"url": server.base_url + mock_server.POWER_PATH, "rate_per_host": 0, "max_workers": args.workers}
+    names = [f.name for f in DEFAULT_FEATURES]
+
+    start = time.perf_counter()
+    one_pass, report = enrich_events(events, features=DEFAULT_FEATURES, **options)
+    one_pass_s = time.perf_counter() - start
+    print("one pass:    %4d requests, %.2f s" % (report["planned_requests"], one_pass_s))
+
+    start = time.perf_counter()
+    requests, parts = 0, []
+    for days in sorted({f.days for f in DEFAULT_FEATURES}):
+        features = [f for f in DEFAULT_FEATURES if f.days == days]
+        frame, report = enrich_events(events, features=features, **options)
+        requests += report["planned_requests"]
+        parts.append(frame[[f.name for f in features]])
+    per_window = pd.concat(parts, axis=1)[names]
+    per_window_s = time.perf_counter() - start
+    print("per window:  %4d requests, %.2f s" % (requests, per_window_s))
+
+    assert np.allclose(one_pass[names].to_numpy(), per_window.to_numpy(), equal_nan=True)
+    print("%d features per event, %.1fx faster in one pass" % (len(names), per_window_s / one_pass_s))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,283 @@
+"""Regression-gated benchmark suite for the ingestion, enrichment and modelling stages.
+
+Every case is timed on synthetic events of each ``--sizes`` (the same
+generators the mock NASA server serves), median of ``--repeat`` runs,
+and compared with the stored baseline. A case fails the run (exit status
+1) when it is slower than its baseline by more than ``allowed(base)``:
+``--threshold`` of the baseline plus a noise term that grows with the
+square root of its duration, so a 20 ms case may take about 3x as long and a
+10 s case about 35% longer before the gate trips. ``--save`` rewrites the
+baseline from this run:
+
+    python -m benchmarks.suite --sizes 1000 100000 1000000 --threshold 0.25
+    python -m benchmarks.suite --only aggregates models --save
+
+Parsing and enrichment cases build one mock POWER response per planned
+request, so they stop at ``FETCH_LIMIT`` events; larger sizes are
+reported as skipped. The replay cases run the offline path end to end:
+a replay archive is recorded once from the mock server (untimed), then
+every run syncs EONET and builds the dataset from that archive alone,
+into fresh stores. Recording is the slow part, so they stop at
+``REPLAY_LIMIT`` events. Every case gets one untimed warm-up call.
+"""
+import argparse
+import atexit
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+from sklearn.preprocessing import StandardScaler
+
+from benchmarks.bench_aggregates import synthetic_dataset
+from benchmarks.bench_enrich import WINDOW_DAYS, prepare
+from climate_pipeline import charts, mock_server, store
+from climate_pipeline.aggregates import AggregateStore, from_frame
+from climate_pipeline.cache import ClimateCache
+from climate_pipeline.enrich import attach_climate, power_long
+from climate_pipeline.eonet import FULL_PARAMS, EventStore, events_frame, iter_events, sync_events
+from climate_pipeline.fetch import API_BASE_ENV
+from climate_pipeline.mock_server import EVENTS_HEAD, synthetic_events
+from climate_pipeline.models import CLASSIFIERS, MODELS, features, predict
+from climate_pipeline.pipeline import build_dataset
+from climate_pipeline.power import parse_daily
+from climate_pipeline.replay import ARCHIVE_ENV, MODE_ENV
+
+BASELINE = os.path.join(os.path.dirname(__file__), "baseline.json")
+SIZES = [1_000, 100_000, 1_000_000]
+FETCH_LIMIT = 100_000
+REPLAY_LIMIT = 10_000
+DEFAULT_THRESHOLD = 0.25  # fail when a case is 25% slower than its baseline
+NOISE_SCALE = 0.3  # seconds ** 0.5; run-to-run noise allowed on top of the threshold
+CHUNK_SIZE = 1 << 16
+
+# the ten EDA figures of main.py's Visualizations tab
+CHARTS = {
+    "temp_hist": lambda a: charts.histogram(a, "temp"),
+    "temp_wind": charts.binned_scatter,
+    "temp_violin": lambda a: charts.violin(a, "temp"),
+    "correlation": charts.correlation,
+    "precip_hist": lambda a: charts.histogram(a, "precip"),
+    "humidity_box": lambda a: charts.box(a, "humidity"),
+    "category_counts": charts.category_counts,
+    "precip_box": lambda a: charts.box(a, "precip"),
+    "monthly_counts": charts.monthly_counts,
+    "wind_hist": lambda a: charts.histogram(a, "wind")
+}
+
+
+# -----------------------------
+# Cases
+# -----------------------------
+def eonet_cases(n):
+    body = (EVENTS_HEAD + ",".join(json.dumps(e) for e in synthetic_events(n)) + "]}").encode()
+    chunks = [body[i:i + CHUNK_SIZE] for i in range(0, len(body), CHUNK_SIZE)]
+    return {"eonet.parse": lambda: events_frame(iter_events(chunks))}
+
+
+def power_cases(n):
+    events, plan, responses, _ = prepare(n)
+    bodies = [json.dumps(js) for js in responses]
+    climates = [parse_daily(js) for js in responses]
+    cells = [(r.lat, r.lon) for r in plan]
+    return {
+        "power.parse": lambda: [parse_daily(json.loads(b)) for b in bodies],
+        "enrich.join": lambda: attach_climate(events, power_long(cells, climates), WINDOW_DAYS)
+    }
+
+
+def scratch_dir():
+    """A temporary directory removed when the suite exits."""
+    path = tempfile.mkdtemp(prefix="suite-")
+    atexit.register(shutil.rmtree, path, True)
+    return path
+
+
+def with_env(fn, **env):
+    """``fn`` run with ``env`` set, restoring the previous values after."""
+    def run():
+        saved = {key: os.environ.get(key) for key in env}
+        os.environ.update(env)
+        try:
+            return fn()
+        finally:
+            for key, value in saved.items():
+                if value is None:
+                    os.environ.pop(key, None)
+                else:
+                    os.environ[key] = value
+    return run
+
+
+def replay_cases(n):
+    path = scratch_dir()
+    archive = os.path.join(path, "replay.sqlite")
+    server = mock_server.serve(events=n)
+    recorded = EventStore(os.path.join(path, "events.sqlite"))
+    params = dict(FULL_PARAMS, limit=n)
+
+    def record():
+        sync_events(recorded, full_params=params)
+        build_dataset(recorded, os.path.join(path, "dataset"), cache=ClimateCache(os.path.join(path, "cache.sqlite")),
+                      max_workers=16, rate_per_host=0)
+
+    with_env(record, **{MODE_ENV: "record", ARCHIVE_ENV: archive, API_BASE_ENV: server.base_url})()
+    server.shutdown()
+    server.server_close()
+
+    def sync():
+        with tempfile.TemporaryDirectory(dir=path) as run:
+            sync_events(EventStore(os.path.join(run, "events.sqlite")), full_params=params)
+
+    def build():
+        # empty stores: the event store also holds per-event climate, which would skip every fetch
+        with tempfile.TemporaryDirectory(dir=path) as run:
+            event_store = EventStore(os.path.join(run, "events.sqlite"))
+            sync_events(event_store, full_params=params)
+            build_dataset(event_store, os.path.join(run, "dataset"), cache=ClimateCache(os.path.join(run, "cache.sqlite")),
+                          max_workers=16)
+
+    env = {MODE_ENV: "replay", ARCHIVE_ENV: archive}
+    return {"replay.eonet.sync": with_env(sync, **env), "replay.build": with_env(build, **env)}
+
+
+def aggregate_cases(frame):
+    aggregates = from_frame(frame)
+    path = scratch_dir()
+    store.write_dataset(frame, os.path.join(path, "dataset"))
+
+    def load():
+        # what an app does on a new dataset version it has no partials for yet
+        with tempfile.TemporaryDirectory(dir=path) as run:
+            AggregateStore(os.path.join(run, "aggregates.sqlite")).load(os.path.join(path, "dataset"))
+
+    cases = {"aggregates.partials": lambda: from_frame(frame), "aggregates.load": load}
+    for name, chart in CHARTS.items():
+        cases["aggregates.chart." + name] = lambda chart=chart: chart(aggregates)
+    return cases
+
+
+def model_cases(frame):
+    _, X, y = features(frame)
+    scaler = StandardScaler().fit(X)
+    Xs = np.ascontiguousarray(scaler.transform(X), dtype=np.float32)
+    models = {}
+
+    def fit(name):
+        model = MODELS[name][0]()
+        if name in CLASSIFIERS:
+            model.fit(Xs, y)
+        else:
+            model.fit(Xs)
+        models[name] = model
+
+    cases = {"models.fit." + name.replace(" ", "_"): lambda name=name: fit(name) for name in MODELS}
+    cases["models.predict"] = lambda: predict({"scaler": scaler, "models": models}, frame)
+    return cases
+
+
+def time_case(fn, repeat):
+    fn()  # warm-up: imports, plotly templates and first-touch allocations stay out of the timings
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return float(np.median(times))
+
+
+def run_suite(sizes, repeat, only=()):
+    """Yield ``("case@size", seconds)`` for every case and size that applies."""
+    groups = [("eonet", FETCH_LIMIT, eonet_cases), ("power", FETCH_LIMIT, power_cases),
+              ("replay", REPLAY_LIMIT, replay_cases),
+              ("aggregates", None, aggregate_cases), ("models", None, model_cases)]
+    for n in sizes:
+        frame = None
+        for group, limit, setup in groups:
+            if only and group not in only:
+                continue
+            if limit and n > limit:
+                print("%-40s %9d  skipped (above %d events)" % (group + ".*", n, limit))
+                continue
+            if limit:
+                cases = setup(n)
+            else:
+                frame = synthetic_dataset(n) if frame is None else frame
+                cases = setup(frame)
+            for name, fn in cases.items():
+                yield "%s@%d" % (name, n), time_case(fn, repeat)
+
+
+def allowed(base, threshold):
+    """Seconds a case with baseline ``base`` may slow down before it counts as a regression.
+
+    Relative noise is largest for short cases (timer resolution, a
+    scheduler tick, a cold page cache on the disk-bound ones), so the
+    slack shrinks from several times ``base`` to about ``threshold`` as
+    ``base`` grows.
+    """
+    return threshold * base + NOISE_SCALE * base ** 0.5
+
+
+def compare(results, baseline, threshold):
+    """Cases slower than ``baseline`` by more than ``allowed``."""
+    regressions = []
+    for key, seconds in results.items():
+        base = baseline.get(key)
+        if base and seconds - base > allowed(base, threshold):
+            regressions.append((key, base, seconds))
+    return regressions
+
+
+def machine():
+    return {"python": platform.python_version(), "platform": platform.platform(), "cpus": os.cpu_count()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=SIZES)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    parser.add_argument("--only", nargs="+", default=(), choices=["eonet", "power", "replay", "aggregates", "models"])
+    parser.add_argument("--baseline", default=BASELINE)
+    parser.add_argument("--save", action="store_true", help="store this run as the baseline")
+    args = parser.parse_args()
+
+    stored = {"machine": None, "results": {}}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            stored = json.load(f)
+    if stored["machine"] and stored["machine"] != machine():
+        print("note: baseline was recorded on %s" % stored["machine"])
+    baseline = stored["results"]
+
+    results = {}
+    print("%-40s %9s %9s %8s" % ("case@events", "seconds", "baseline", "change"))
+    for key, seconds in run_suite(args.sizes, args.repeat, args.only):
+        results[key] = seconds
+        base = baseline.get(key)
+        change = "%+7.0f%%" % (100 * (seconds / base - 1)) if base else "     new"
+        print("%-40s %9.4f %9s %s" % (key, seconds, "%.4f" % base if base else "-", change))
+
+    if args.save:
+        with open(args.baseline, "w") as f:
+            json.dump({"machine": machine(), "results": dict(baseline, **results)}, f, indent=2, sort_keys=True)
+        print("baseline saved to", args.baseline)
+        return
+
+    regressions = compare(results, baseline, args.threshold)
+    for key, base, seconds in regressions:
+        print("REGRESSION %s: %.4f s -> %.4f s (%.0f%% slower, %.4f s allowed)" % (
+            key, base, seconds, 100 * (seconds / base - 1), allowed(base, args.threshold)
+        ))
+    if regressions:
+        sys.exit(1)
+    print("no case regressed beyond its allowance (%.0f%% plus noise)" % (100 * args.threshold))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1 @@
+"""Data pipeline shared by the Streamlit apps and the analysis notebook."""
@@ -0,0 +1,150 @@
+"""Headless pipeline: ingest EONET events, enrich them into the dataset, export it.
+
+Runs the same stores and dataset the Streamlit apps read, without
+importing Streamlit or any plotting library:
+
+    python -m climate_pipeline ingest
+    python -m climate_pipeline enrich --sample-size 500 --features default
+    python -m climate_pipeline export events.csv --categories Wildfires --start 2024-01-01
+    python -m climate_pipeline --metrics data/metrics.json enrich --offline
+    python -m climate_pipeline refresh --every 21600
+"""
+import argparse
+import os
+import sys
+import time
+
+from climate_pipeline import eonet, metrics, store
+from climate_pipeline.cache import DEFAULT_PATH as CACHE_PATH, ClimateCache, is_offline
+from climate_pipeline.enrich import DEFAULT_FEATURES, parse_features
+from climate_pipeline.fetch import DEFAULT_MAX_WORKERS, DEFAULT_RATE_PER_HOST
+from climate_pipeline.pipeline import build_dataset
+from climate_pipeline.refresh import FileLock, lock_path, refresh as refresh_dataset
+
+EXPORT_FORMATS = (".csv", ".parquet", ".json")
+
+
+def ingest(args):
+    summary = eonet.sync_events(eonet.EventStore(args.events))
+    if not summary["ok"]:
+        sys.exit("EONET sync failed; the watermark was not moved")
+    print("%s sync: %d fetched, %d new, %d updated, %d stored" % (
+        summary["mode"], summary["fetched"], len(summary["new"]), len(summary["updated"]), summary["total"]
+    ))
+
+
+def enrich(args):
+    try:
+        features = DEFAULT_FEATURES if args.features == ["default"] else parse_features(args.features)
+    except ValueError as e:
+        sys.exit(str(e))
+    # the same lock as refresh: builds share the staging directory and the checkpoint
+    lock = FileLock(lock_path(args.dataset))
+    if not lock.acquire():
+        print("waiting for the refresh holding %s" % lock_path(args.dataset))
+        lock.acquire(blocking=True)
+    try:
+        summary = build_dataset(
+            eonet.EventStore(args.events), args.dataset, sample_size=args.sample_size, features=features,
+            progress=lambda done, total: print("%d/%d events" % (done, total)),
+            cache=ClimateCache(args.cache), offline=args.offline, max_workers=args.workers, rate_per_host=args.rate
+        )
+    finally:
+        lock.release()
+    report = summary["report"]
+    print("%d rows in %s (%d POWER requests planned for %d events)" % (
+        summary["rows"], args.dataset, report["planned_requests"], report["events"]
+    ))
+    if not summary["rows"]:
+        sys.exit("no events could be enriched; the previous dataset was kept")
+
+
+def refresh(args):
+    event_store, cache = eonet.EventStore(args.events), ClimateCache(args.cache)
+    try:
+        while True:
+            summary = refresh_dataset(event_store, args.dataset, offline=args.offline, force=args.force,
+                                      cache=cache, rate_per_host=args.rate)
+            if summary is None:
+                print("another refresh holds %s; skipped" % lock_path(args.dataset))
+            elif summary["sync"] and not summary["sync"]["ok"] and not summary["built"]:
+                print("EONET sync failed; %s was left as it is" % args.dataset)
+            elif not summary["built"]:
+                print("no new or updated events; %s was left as it is" % args.dataset)
+            else:
+                print("new version of %s: %d rows" % (args.dataset, summary["rows"]))
+            if not args.every:
+                return
+            time.sleep(args.every)
+    finally:
+        event_store.close()
+        cache.close()
+
+
+def export(args):
+    ext = os.path.splitext(args.output)[1].lower()
+    if ext not in EXPORT_FORMATS:
+        sys.exit("output must end in one of %s" % ", ".join(EXPORT_FORMATS))
+    if not store.exists(args.dataset):
+        sys.exit("no dataset at %s; run the enrich command first" % args.dataset)
+    frame = store.read_dataset(args.dataset, columns=args.columns, categories=args.categories,
+                               start=args.start, end=args.end)
+    if ext == ".csv":
+        frame.to_csv(args.output, index=False)
+    elif ext == ".parquet":
+        frame.to_parquet(args.output, index=False)
+    else:
+        frame.to_json(args.output, orient="records", date_format="iso", lines=True)
+    print("%d rows written to %s" % (len(frame), args.output))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m climate_pipeline", description=__doc__.splitlines()[0])
+    parser.add_argument("--metrics", help="write stage timings and counters to this JSON file")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    p = commands.add_parser("ingest", help="sync EONET events into the event store")
+    p.add_argument("--events", default=eonet.DEFAULT_PATH)
+    p.set_defaults(run=ingest)
+
+    p = commands.add_parser("enrich", help="attach POWER climate and publish the dataset")
+    p.add_argument("--events", default=eonet.DEFAULT_PATH)
+    p.add_argument("--dataset", default=store.DEFAULT_PATH)
+    p.add_argument("--cache", default=CACHE_PATH)
+    p.add_argument("--sample-size", type=int, default=None, help="default: every event")
+    p.add_argument("--features", nargs="+", default=[],
+                   help="window features such as precip_sum_30d, or 'default' for the standard set")
+    p.add_argument("--offline", action="store_true", default=is_offline(), help="use cached climate only")
+    p.add_argument("--workers", type=int, default=DEFAULT_MAX_WORKERS)
+    p.add_argument("--rate", type=float, default=DEFAULT_RATE_PER_HOST, help="requests per second per host, 0 for none")
+    p.set_defaults(run=enrich)
+
+    p = commands.add_parser("refresh", help="sync and rebuild under the refresh lock, keeping the sample size")
+    p.add_argument("--events", default=eonet.DEFAULT_PATH)
+    p.add_argument("--dataset", default=store.DEFAULT_PATH)
+    p.add_argument("--cache", default=CACHE_PATH)
+    p.add_argument("--offline", action="store_true", default=is_offline(), help="rebuild from cached climate only")
+    p.add_argument("--rate", type=float, default=DEFAULT_RATE_PER_HOST, help="requests per second per host, 0 for none")
+    p.add_argument("--every", type=float, help="keep running, refreshing every this many seconds")
+    p.add_argument("--force", action="store_true", help="rebuild even when no event changed")
+    p.set_defaults(run=refresh)
+
+    p = commands.add_parser("export", help="write (part of) the dataset as CSV, Parquet or JSON lines")
+    p.add_argument("output")
+    p.add_argument("--dataset", default=store.DEFAULT_PATH)
+    p.add_argument("--columns", nargs="+")
+    p.add_argument("--categories", nargs="+")
+    p.add_argument("--start", help="first event date, YYYY-MM-DD")
+    p.add_argument("--end", help="last event date, YYYY-MM-DD")
+    p.set_defaults(run=export)
+
+    args = parser.parse_args(argv)
+    try:
+        args.run(args)
+    finally:
+        if args.metrics:
+            metrics.export_json(args.metrics)
+
+
+if __name__ == "__main__":
+    main()
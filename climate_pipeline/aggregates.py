@@ -0,0 +1,306 @@
+"""Materialised chart aggregates over the Parquet dataset.
+
+Every EDA chart is drawn from a handful of small aggregates instead of
+raw rows: fixed-edge histograms (which also give per-category quantiles
+and violin densities), a temp x wind binned count grid, monthly counts and
+the moments behind the correlation matrix. All of them add up across
+partitions, so they are computed once per year/month/category partition
+and summed on read.
+
+Partials are stored in SQLite keyed by a fingerprint of the partition's
+files. When a new dataset version lands only partitions whose files
+changed are recomputed; the merged result is then stored under that version.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+from urllib.parse import unquote
+
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+
+from climate_pipeline import store
+from climate_pipeline.enrich import VARIABLES
+
+DEFAULT_PATH = os.path.join("data", "aggregates.sqlite")
+
+# fixed edges so partials from different partitions line up bin for bin;
+# out-of-range values land in the end bins, exact extremes are kept separately
+BINS = {
+    "temp": (-60.0, 60.0, 480),
+    "humidity": (0.0, 100.0, 400),
+    "wind": (0.0, 40.0, 400),
+    "precip": (0.0, 200.0, 800)
+}
+GRID = ("temp", "wind", 60, 40)  # x, y and their bin counts for the binned scatter
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS partials (
+    partition TEXT PRIMARY KEY,
+    fingerprint TEXT NOT NULL,
+    payload TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS materialized (
+    version INTEGER PRIMARY KEY,
+    payload TEXT NOT NULL
+);
+"""
+
+
+def edges(var, bins=None):
+    low, high, n = BINS[var]
+    return np.linspace(low, high, (bins or n) + 1)
+
+
+def fine_counts(values, var):
+    low, high, n = BINS[var]
+    idx = np.floor((values - low) / (high - low) * n).astype(np.int64)
+    return np.bincount(np.clip(idx, 0, n - 1), minlength=n)
+
+
+# -----------------------------
+# Partitions
+# -----------------------------
+def partitions(path=store.DEFAULT_PATH):
+    """``{partition: [files]}`` for every leaf directory holding Parquet files."""
+    found = {}
+    for root, _, files in os.walk(path):
+        files = sorted(f for f in files if f.endswith(".parquet"))
+        if files:
+            found[os.path.relpath(root, path).replace(os.sep, "/")] = [os.path.join(root, f) for f in files]
+    return found
+
+
+def partition_keys(partition):
+    keys = dict(part.split("=", 1) for part in partition.split("/"))
+    return int(keys["year"]), int(keys["month"]), unquote(keys["category"])
+
+
+def fingerprint(files):
+    h = hashlib.sha1()
+    for name in files:
+        h.update(os.path.basename(name).encode())
+        with open(name, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                h.update(block)
+    return h.hexdigest()
+
+
+def partial(frame):
+    """Additive aggregates for one partition's rows."""
+    data = frame[VARIABLES].to_numpy(np.float64)
+    data = data[~np.isnan(data).any(axis=1)]
+    x, y, nx, ny = GRID
+    grid, _, _ = np.histogram2d(
+        np.clip(data[:, VARIABLES.index(x)], BINS[x][0], BINS[x][1]),
+        np.clip(data[:, VARIABLES.index(y)], BINS[y][0], BINS[y][1]),
+        bins=[edges(x, nx), edges(y, ny)]
+    )
+    return {
+        "rows": len(data),
+        "hist": {v: fine_counts(data[:, j], v).tolist() for j, v in enumerate(VARIABLES)},
+        "min": data.min(axis=0).tolist() if len(data) else [np.inf] * len(VARIABLES),
+        "max": data.max(axis=0).tolist() if len(data) else [-np.inf] * len(VARIABLES),
+        "grid": grid.astype(np.int64).tolist(),
+        "sum": data.sum(axis=0).tolist(),
+        "cross": (data.T @ data).tolist()
+    }
+
+
+def partial_files(files):
+    return partial(pq.read_table(files, columns=VARIABLES).to_pandas())
+
+
+# -----------------------------
+# Merged view
+# -----------------------------
+class Aggregates:
+    """Per-partition partials with chart-ready queries over any category subset."""
+
+    def __init__(self, partials):
+        self.partials = partials
+
+    def _select(self, categories=None):
+        return [
+            (keys, p) for keys, p in self.partials
+            if not categories or keys[2] in categories
+        ]
+
+    def categories(self):
+        return sorted({keys[2] for keys, _ in self.partials})
+
+    def rows(self, categories=None):
+        return sum(p["rows"] for _, p in self._select(categories))
+
+    def category_counts(self, categories=None):
+        counts = {}
+        for (_, _, category), p in self._select(categories):
+            counts[category] = counts.get(category, 0) + p["rows"]
+        return pd.Series(counts, name="count").rename_axis("category").sort_values(ascending=False)
+
+    def monthly_counts(self, categories=None):
+        """Event counts per calendar month (1-12), summed over years."""
+        counts = np.zeros(12, dtype=np.int64)
+        for (_, month, _), p in self._select(categories):
+            counts[month - 1] += p["rows"]
+        return pd.Series(counts, index=pd.RangeIndex(1, 13, name="month"), name="count")
+
+    def _fine(self, var, categories=None):
+        parts = self._select(categories)
+        counts = np.zeros(BINS[var][2], dtype=np.int64)
+        low, high = np.inf, -np.inf
+        j = VARIABLES.index(var)
+        for _, p in parts:
+            counts += np.asarray(p["hist"][var], dtype=np.int64)
+            low, high = min(low, p["min"][j]), max(high, p["max"][j])
+        return counts, low, high
+
+    def histogram(self, var, bins=30, categories=None):
+        """``(edges, counts)`` over the populated range, about ``bins`` bins wide."""
+        counts, _, _ = self._fine(var, categories)
+        filled = np.flatnonzero(counts)
+        if not len(filled):
+            return edges(var, 1), np.zeros(1, dtype=np.int64)
+        first, span = filled[0], filled[-1] + 1 - filled[0]
+        step = -(-span // bins)
+        groups = -(-span // step)
+        counts = np.pad(counts, (0, max(0, first + groups * step - len(counts))))
+        grouped = counts[first:first + groups * step].reshape(groups, step).sum(axis=1)
+        low, high, n = BINS[var]
+        return low + (first + np.arange(groups + 1) * step) * (high - low) / n, grouped
+
+    def quantiles(self, var, qs=(0.25, 0.5, 0.75), categories=None):
+        """Per-category quantiles, interpolated inside the fine bins (error under one bin)."""
+        fine = edges(var)
+        rows = {}
+        for category in categories or self.categories():
+            counts, low, high = self._fine(var, [category])
+            total = counts.sum()
+            if not total:
+                continue
+            cum = np.cumsum(counts)
+            values = []
+            for q in qs:
+                target = q * total
+                i = min(int(np.searchsorted(cum, target, side="left")), len(counts) - 1)
+                before = cum[i] - counts[i]
+                frac = (target - before) / counts[i] if counts[i] else 0.0
+                values.append(float(np.clip(fine[i] + frac * (fine[i + 1] - fine[i]), low, high)))
+            rows[category] = values + [low, high]
+        return pd.DataFrame.from_dict(rows, orient="index", columns=[*qs, "min", "max"]).rename_axis("category")
+
+    def box_stats(self, var, categories=None):
+        """q1/median/q3 and whisker ends (1.5 IQR, clipped to the data) per category."""
+        q = self.quantiles(var, (0.25, 0.5, 0.75), categories)
+        iqr = q[0.75] - q[0.25]
+        return pd.DataFrame({
+            "q1": q[0.25],
+            "median": q[0.5],
+            "q3": q[0.75],
+            "lowerfence": np.maximum(q["min"], q[0.25] - 1.5 * iqr),
+            "upperfence": np.minimum(q["max"], q[0.75] + 1.5 * iqr)
+        })
+
+    def density(self, var, category, bins=60):
+        """``(centres, share)`` of one category's values for violin outlines."""
+        edges_, counts = self.histogram(var, bins, [category])
+        total = counts.sum()
+        return (edges_[:-1] + edges_[1:]) / 2, counts / total if total else counts
+
+    def binned(self, categories=None):
+        """Binned ``GRID`` counts as ``(x_edges, y_edges, counts[x, y])``."""
+        x, y, nx, ny = GRID
+        grid = np.zeros((nx, ny), dtype=np.int64)
+        for _, p in self._select(categories):
+            grid += np.asarray(p["grid"], dtype=np.int64)
+        return edges(x, nx), edges(y, ny), grid
+
+    def correlation(self, categories=None):
+        """Pearson correlation of the climate variables from pooled moments."""
+        k = len(VARIABLES)
+        n, s, cross = 0, np.zeros(k), np.zeros((k, k))
+        for _, p in self._select(categories):
+            n += p["rows"]
+            s += p["sum"]
+            cross += p["cross"]
+        if n < 2:
+            return pd.DataFrame(np.nan, index=VARIABLES, columns=VARIABLES)
+        mean = s / n
+        cov = cross / n - np.outer(mean, mean)
+        sd = np.sqrt(np.clip(np.diag(cov), 0, None))
+        with np.errstate(invalid="ignore", divide="ignore"):
+            corr = cov / np.outer(sd, sd)
+        return pd.DataFrame(corr, index=VARIABLES, columns=VARIABLES)
+
+
+def from_frame(frame):
+    """Aggregates over an in-memory subset (e.g. a region), grouped like the partitions."""
+    dates = pd.to_datetime(frame["date"], utc=True)
+    groups = frame.groupby(
+        [dates.dt.year.rename("year"), dates.dt.month.rename("month"), frame["category"].astype(str)],
+        sort=True
+    )
+    return Aggregates([((int(y), int(m), c), partial(g)) for (y, m, c), g in groups])
+
+
+# -----------------------------
+# Persistent store
+# -----------------------------
+class AggregateStore:
+
+    def __init__(self, path=DEFAULT_PATH):
+        self.path = path
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(SCHEMA)
+        self.reused = 0
+        self.computed = 0
+
+    def close(self):
+        self._db.close()
+
+    def load(self, dataset=store.DEFAULT_PATH):
+        """Aggregates for the dataset's current version.
+
+        A version seen before is one row read; a new version reuses every
+        partition partial whose files are unchanged and computes the rest.
+        """
+        dataset = store.current(dataset)  # one version throughout, even if a swap lands meanwhile
+        version = store.manifest(dataset)["version"]
+        with self._lock:
+            row = self._db.execute("SELECT payload FROM materialized WHERE version=?", (version,)).fetchone()
+        if row:
+            return self._aggregates(json.loads(row[0]))
+
+        merged = {}
+        with self._lock:
+            for partition, files in partitions(dataset).items():
+                fp = fingerprint(files)
+                row = self._db.execute(
+                    "SELECT payload FROM partials WHERE partition=? AND fingerprint=?", (partition, fp)
+                ).fetchone()
+                if row:
+                    merged[partition] = json.loads(row[0])
+                    self.reused += 1
+                    continue
+                merged[partition] = partial_files(files)
+                self.computed += 1
+                self._db.execute(
+                    "INSERT OR REPLACE INTO partials VALUES (?, ?, ?)",
+                    (partition, fp, json.dumps(merged[partition]))
+                )
+            self._db.execute("DELETE FROM partials WHERE partition NOT IN (%s)" % ",".join("?" * len(merged)),
+                             list(merged))
+            self._db.execute("DELETE FROM materialized")
+            self._db.execute("INSERT INTO materialized VALUES (?, ?)", (version, json.dumps(merged)))
+            self._db.commit()
+        return self._aggregates(merged)
+
+    def _aggregates(self, merged):
+        return Aggregates([(partition_keys(k), p) for k, p in sorted(merged.items())])
@@ -0,0 +1,171 @@
+"""Persistent point-level climate cache backed by SQLite.
+
+Daily POWER values are stored one row per (lat, lon, date, parameter set),
+with coordinates rounded so nearby lookups share an entry. Entries expire
+after ``ttl`` seconds and the least recently used rows are evicted once the
+cache grows past ``max_entries``.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta
+
+from climate_pipeline import metrics
+
+DEFAULT_PATH = os.path.join("data", "climate_cache.sqlite")
+DEFAULT_TTL = 30 * 24 * 3600  # seconds; None keeps entries forever
+FILL_TTL = 24 * 3600  # seconds; days POWER had not published yet are fetched again after this
+DEFAULT_MAX_ENTRIES = 500_000
+COORD_PRECISION = 2  # decimal places, ~1 km; far finer than the POWER grid
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS climate (
+    lat REAL NOT NULL,
+    lon REAL NOT NULL,
+    date TEXT NOT NULL,
+    parameters TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    fetched_at REAL NOT NULL,
+    accessed_at REAL NOT NULL,
+    PRIMARY KEY (lat, lon, date, parameters)
+);
+CREATE INDEX IF NOT EXISTS climate_accessed ON climate (accessed_at);
+"""
+
+
+def date_range(start, end):
+    """Every YYYYMMDD day from ``start`` to ``end`` inclusive."""
+    day = datetime(int(start[:4]), int(start[4:6]), int(start[6:8]))
+    last = datetime(int(end[:4]), int(end[4:6]), int(end[6:8]))
+    days = []
+    while day <= last:
+        days.append(day.strftime("%Y%m%d"))
+        day += timedelta(days=1)
+    return days
+
+
+def is_offline():
+    """The ``CLIMATE_OFFLINE`` environment switch: rebuild from cache only."""
+    return os.environ.get("CLIMATE_OFFLINE", "").lower() in ("1", "true", "yes")
+
+
+class ClimateCache:
+
+    def __init__(self, path=DEFAULT_PATH, ttl=DEFAULT_TTL, max_entries=DEFAULT_MAX_ENTRIES,
+                 precision=COORD_PRECISION):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.precision = precision
+        self.hits = 0
+        self.misses = 0
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        # WAL stays consistent without an fsync per commit; a crash only loses the last few writes
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(SCHEMA)
+
+    def close(self):
+        self._db.close()
+
+    def snap(self, lat, lon):
+        return round(float(lat), self.precision), round(float(lon), self.precision)
+
+    # -----------------------------
+    # Climate entries
+    # -----------------------------
+    def get_range(self, lat, lon, start, end, parameters, stale_ok=False):
+        """Look up every day in ``start..end``.
+
+        Returns ``(climate, complete)`` where ``climate`` is shaped like
+        ``power.parse_daily`` output (or None when no day is cached) and
+        ``complete`` says whether every day was found. ``stale_ok`` also
+        accepts entries past their TTL, which is what offline mode wants.
+        """
+        lat, lon = self.snap(lat, lon)
+        now = time.time()
+        oldest = now - self.ttl if self.ttl and not stale_ok else 0
+        days = date_range(start, end)
+        climate = {}
+        found = []
+        with self._lock:
+            for day in days:
+                row = self._db.execute(
+                    "SELECT payload FROM climate WHERE lat=? AND lon=? AND date=? AND parameters=?"
+                    " AND fetched_at >= ?",
+                    (lat, lon, day, parameters, oldest)
+                ).fetchone()
+                if row is None:
+                    self.misses += 1
+                    continue
+                self.hits += 1
+                found.append((now, lat, lon, day, parameters))
+                for name, value in json.loads(row[0]).items():
+                    climate.setdefault(name, {})[day] = value
+            if found:
+                self._db.executemany(
+                    "UPDATE climate SET accessed_at=? WHERE lat=? AND lon=? AND date=? AND parameters=?",
+                    found
+                )
+                self._db.commit()
+        metrics.count("cache.hit_days", len(found))
+        metrics.count("cache.miss_days", len(days) - len(found))
+        return (climate or None), len(found) == len(days)
+
+    def put_range(self, lat, lon, climate, parameters, fill_value=None):
+        """Store parsed ``{column: {date: value}}`` values, one row per day.
+
+        Days with any ``fill_value`` (recent days POWER has not published
+        yet) are kept for ``FILL_TTL`` only, so they are fetched again
+        instead of counting as cached for the full TTL; without a TTL
+        they are not stored at all. Call ``evict`` once after a batch of
+        writes to enforce the limits.
+        """
+        lat, lon = self.snap(lat, lon)
+        by_day = {}
+        for name, series in climate.items():
+            for day, value in series.items():
+                by_day.setdefault(day, {})[name] = value
+        now = time.time()
+        rows = []
+        for day, values in by_day.items():
+            fetched_at = now
+            if fill_value is not None and fill_value in values.values():
+                if not self.ttl:
+                    continue
+                fetched_at = now - self.ttl + min(FILL_TTL, self.ttl)  # expires FILL_TTL from now
+            rows.append((lat, lon, day, parameters, json.dumps(values), fetched_at, now))
+        with self._lock:
+            self._db.executemany("INSERT OR REPLACE INTO climate VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+            self._db.commit()
+
+    def evict(self):
+        """Drop expired rows, then least recently used rows above ``max_entries``."""
+        with self._lock:
+            if self.ttl:
+                self._db.execute("DELETE FROM climate WHERE fetched_at < ?", (time.time() - self.ttl,))
+            if self.max_entries:
+                excess = self._db.execute("SELECT COUNT(*) FROM climate").fetchone()[0] - self.max_entries
+                if excess > 0:
+                    self._db.execute(
+                        "DELETE FROM climate WHERE rowid IN"
+                        " (SELECT rowid FROM climate ORDER BY accessed_at LIMIT ?)",
+                        (excess,)
+                    )
+            self._db.commit()
+
+    def stats(self):
+        with self._lock:
+            entries = self._db.execute("SELECT COUNT(*) FROM climate").fetchone()[0]
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": entries
+        }
@@ -0,0 +1,109 @@
+"""Plotly figures drawn from materialised aggregates, never from raw rows.
+
+Each function takes an ``aggregates.Aggregates`` (or, for the map, the
+hex bins from ``geobin.bin_points``) and returns a figure whose size
+depends on the number of bins and categories, not on the number of
+events behind them.
+"""
+import numpy as np
+import plotly.express as px
+import plotly.graph_objects as go
+
+from climate_pipeline.aggregates import GRID
+
+LABELS = {
+    "temp": "Temperature (°C)",
+    "humidity": "Relative humidity (%)",
+    "wind": "Wind speed (m/s)",
+    "precip": "Precipitation (mm/day)"
+}
+MONTHS = ["Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"]
+
+
+def histogram(aggregates, var, bins=30, categories=None, title=None):
+    edges, counts = aggregates.histogram(var, bins, categories)
+    fig = go.Figure(go.Bar(
+        x=(edges[:-1] + edges[1:]) / 2, y=counts, width=np.diff(edges), marker_line_width=0
+    ))
+    fig.update_layout(title=title, xaxis_title=LABELS[var], yaxis_title="Events", bargap=0)
+    return fig
+
+
+def binned_scatter(aggregates, categories=None, title=None):
+    """Event density of ``GRID`` (temp x wind) as a heatmap of bin counts."""
+    x, y, _, _ = GRID
+    x_edges, y_edges, counts = aggregates.binned(categories)
+    fig = go.Figure(go.Heatmap(
+        x=(x_edges[:-1] + x_edges[1:]) / 2, y=(y_edges[:-1] + y_edges[1:]) / 2,
+        z=np.where(counts > 0, counts, np.nan).T, colorscale="Viridis", colorbar_title="Events"
+    ))
+    fig.update_layout(title=title, xaxis_title=LABELS[x], yaxis_title=LABELS[y])
+    return fig
+
+
+def violin(aggregates, var, categories=None, title=None):
+    """Mirrored per-category densities, the shape of a violin plot."""
+    fig = go.Figure()
+    for i, category in enumerate(categories or aggregates.categories()):
+        centres, share = aggregates.density(var, category)
+        if not share.sum():
+            continue
+        half = 0.4 * share / share.max()
+        fig.add_trace(go.Scatter(
+            x=np.concatenate([i - half, (i + half)[::-1]]),
+            y=np.concatenate([centres, centres[::-1]]),
+            fill="toself", mode="lines", name=category, hoverinfo="name"
+        ))
+    names = categories or aggregates.categories()
+    fig.update_layout(
+        title=title, yaxis_title=LABELS[var],
+        xaxis={"tickmode": "array", "tickvals": list(range(len(names))), "ticktext": names}
+    )
+    return fig
+
+
+def box(aggregates, var, categories=None, title=None):
+    stats = aggregates.box_stats(var, categories)
+    fig = go.Figure(go.Box(
+        x=list(stats.index), q1=stats["q1"], median=stats["median"], q3=stats["q3"],
+        lowerfence=stats["lowerfence"], upperfence=stats["upperfence"]
+    ))
+    fig.update_layout(title=title, yaxis_title=LABELS[var])
+    return fig
+
+
+def correlation(aggregates, categories=None, title=None):
+    corr = aggregates.correlation(categories)
+    fig = go.Figure(go.Heatmap(
+        x=list(corr.columns), y=list(corr.index), z=corr.to_numpy(),
+        zmin=-1, zmax=1, colorscale="RdBu_r",
+        text=np.round(corr.to_numpy(), 2), texttemplate="%{text}"
+    ))
+    fig.update_layout(title=title, yaxis_autorange="reversed")
+    return fig
+
+
+def category_counts(aggregates, categories=None, title=None):
+    counts = aggregates.category_counts(categories)
+    fig = go.Figure(go.Bar(x=list(counts.index), y=counts.to_numpy()))
+    fig.update_layout(title=title, xaxis_title="Category", yaxis_title="Events")
+    return fig
+
+
+def monthly_counts(aggregates, categories=None, title=None):
+    counts = aggregates.monthly_counts(categories)
+    fig = go.Figure(go.Bar(x=MONTHS, y=counts.to_numpy()))
+    fig.update_layout(title=title, xaxis_title="Month", yaxis_title="Events")
+    return fig
+
+
+def hex_map(cells, title=None):
+    """Binned event map: one marker per hex, sized by count, coloured by
+    the dominant category, with the full category mix on hover."""
+    mix = [c for c in cells.columns if c not in ("latitude", "longitude", "count", "category")]
+    fig = px.scatter_geo(
+        cells, lat="latitude", lon="longitude", size="count", color="category",
+        hover_data={"count": True, **{c: True for c in mix}}, size_max=30, title=title
+    )
+    fig.update_traces(marker_line_width=0)
+    return fig
@@ -0,0 +1,208 @@
+"""Per-cell daily climatology for anomaly and z-score features.
+
+For every POWER grid cell an event falls in, multi-year daily values are
+fetched once (one ranged request per cell and decade) and reduced to a
+mean and standard deviation per day of year, pooled over a short window
+around each day. The result is kept as dense ``(cell, day, variable)``
+float32 arrays plus a table from cell id to row, saved to
+``data/climatology.npz``, so looking up any event is a couple of array
+indexing operations and later runs only fetch cells they have not seen.
+
+    python -m climate_pipeline.climatology --dataset data/dataset
+"""
+import argparse
+import os
+
+import numpy as np
+
+from climate_pipeline import store
+from climate_pipeline.enrich import VARIABLES, event_days, power_long
+from climate_pipeline.planner import GRID_LAT, LON_CELLS, grid_cells, snap_arrays
+from climate_pipeline.power import fetch_power
+
+DEFAULT_PATH = os.path.join("data", "climatology.npz")
+BASELINE = (1991, 2020)  # the current WMO climate normal
+CHUNK_YEARS = 10  # years per request, keeping single responses bounded
+CELL_BATCH = 64  # cells reduced at a time, bounding the long table in memory
+DAYS = 365  # Feb 29 is folded into Feb 28
+WINDOW = 15  # days pooled around each day of year
+N_CELLS = (int(180 / GRID_LAT) + 1) * LON_CELLS
+
+
+def day_of_year(days):
+    """Zero-based day of year on a 365-day calendar.
+
+    Integer civil-calendar arithmetic on a March-based year, where Feb 29
+    is the last day and folds onto Feb 28; much cheaper than going
+    through ``datetime64[Y]``.
+    """
+    z = np.asarray(days).astype("datetime64[D]").astype(np.int64) + 719468
+    doe = z - (z // 146097) * 146097
+    yoe = (doe - doe // 1460 + doe // 36524 - doe // 146096) // 365
+    march_day = doe - (365 * yoe + yoe // 4 - yoe // 100)
+    return (np.minimum(march_day, 364) + 59) % DAYS
+
+
+def _circular_window(values, window=WINDOW):
+    """Sum of ``values`` over ``window`` days centred on each day of year (axis 1)."""
+    half = window // 2
+    padded = np.concatenate([values[:, -half:], values, values[:, :half]], axis=1)
+    csum = np.concatenate([np.zeros_like(values[:, :1]), np.cumsum(padded, axis=1)], axis=1)
+    return csum[:, window:] - csum[:, :-window]
+
+
+def daily_stats(long, cells):
+    """``(mean, std)`` of shape ``(len(cells), DAYS, n_variables)`` from a
+    ``power_long`` table; ``cells`` are the sorted grid cell ids to reduce."""
+    cell = grid_cells(long["cell_lat"], long["cell_lon"])
+    row = np.searchsorted(cells, cell)
+    key = (row * DAYS + day_of_year(long["date"].to_numpy())) * len(VARIABLES) + long["var"].cat.codes.to_numpy()
+    value = long["value"].to_numpy(np.float64)
+    ok = ~np.isnan(value)
+    size = len(cells) * DAYS * len(VARIABLES)
+    shape = (len(cells), DAYS, len(VARIABLES))
+    n = _circular_window(np.bincount(key[ok], minlength=size).reshape(shape).astype(np.float64))
+    s = _circular_window(np.bincount(key[ok], value[ok], minlength=size).reshape(shape))
+    ss = _circular_window(np.bincount(key[ok], value[ok] ** 2, minlength=size).reshape(shape))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = s / n
+        std = np.sqrt(np.maximum(ss / n - mean ** 2, 0.0) * n / (n - 1))
+    return mean.astype(np.float32), std.astype(np.float32)
+
+
+class Climatology:
+    """Dense per-cell daily means and standard deviations.
+
+    ``slot[cell]`` is the row of ``mean``/``std`` for a grid cell id, or -1.
+    """
+
+    def __init__(self, cells=None, mean=None, std=None):
+        self.cells = np.empty(0, dtype=np.int64) if cells is None else np.asarray(cells, dtype=np.int64)
+        shape = (len(self.cells), DAYS, len(VARIABLES))
+        self.mean = np.empty(shape, dtype=np.float32) if mean is None else mean
+        self.std = np.empty(shape, dtype=np.float32) if std is None else std
+        self.slot = np.full(N_CELLS, -1, dtype=np.int32)
+        self.slot[self.cells] = np.arange(len(self.cells), dtype=np.int32)
+
+    def __len__(self):
+        return len(self.cells)
+
+    def extend(self, cells, mean, std):
+        return Climatology(
+            np.concatenate([self.cells, cells]),
+            np.concatenate([self.mean, mean]), np.concatenate([self.std, std])
+        )
+
+    # -----------------------------
+    # Persistence
+    # -----------------------------
+    def save(self, path=DEFAULT_PATH):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path + ".tmp", "wb") as f:
+            np.savez(f, cells=self.cells, mean=self.mean, std=self.std)
+        os.replace(path + ".tmp", path)
+
+    @classmethod
+    def load(cls, path=DEFAULT_PATH):
+        if not os.path.exists(path):
+            return cls()
+        with np.load(path) as data:
+            return cls(data["cells"], data["mean"], data["std"])
+
+    # -----------------------------
+    # Lookup
+    # -----------------------------
+    def lookup(self, lat, lon, days):
+        """``(mean, std)`` rows for each point and day, NaN for unknown cells."""
+        slot = self.slot[grid_cells(lat, lon)]
+        if not len(self):
+            empty = np.full((len(slot), len(VARIABLES)), np.nan, dtype=np.float32)
+            return empty, empty.copy()
+        row = np.maximum(slot, 0) * DAYS + day_of_year(days)
+        mean = self.mean.reshape(-1, len(VARIABLES)).take(row, axis=0, mode="clip")
+        std = self.std.reshape(-1, len(VARIABLES)).take(row, axis=0, mode="clip")
+        mean[slot < 0] = np.nan
+        std[slot < 0] = np.nan
+        return mean, std
+
+    def anomalies(self, lat, lon, days, values):
+        """``(anomaly, z)`` of ``values`` (``n x n_variables``) against the baseline."""
+        mean, std = self.lookup(lat, lon, days)
+        anomaly = np.asarray(values, dtype=np.float64) - mean
+        with np.errstate(invalid="ignore", divide="ignore"):
+            z = np.where(std > 0, anomaly / std, np.nan)
+        return anomaly, z
+
+
+# -----------------------------
+# Building baselines
+# -----------------------------
+def baseline_requests(cells_lat, cells_lon, years=BASELINE):
+    first, last = years
+    return [
+        (lat, lon, "%d0101" % start, "%d1231" % min(start + CHUNK_YEARS - 1, last))
+        for lat, lon in zip(cells_lat, cells_lon)
+        for start in range(first, last + 1, CHUNK_YEARS)
+    ]
+
+
+def ensure_climatology(lat, lon, path=DEFAULT_PATH, years=BASELINE, offline=False, progress=None,
+                       **fetch_options):
+    """Load the stored climatology, adding any cells of ``lat``/``lon`` it lacks.
+
+    New cells are fetched in batches of ``CELL_BATCH`` and the file is
+    saved after each, so an interrupted run keeps what it finished and
+    cells with any failed request are tried again next time.
+    ``offline=True`` never fetches. ``progress(done, total)`` is called
+    per batch.
+    """
+    climatology = Climatology.load(path)
+    if offline:
+        return climatology
+    cell_lat, cell_lon = snap_arrays(lat, lon)
+    cells, first = np.unique(grid_cells(cell_lat, cell_lon), return_index=True)
+    todo = np.flatnonzero(climatology.slot[cells] < 0)
+    for done in range(0, len(todo), CELL_BATCH):
+        batch = todo[done:done + CELL_BATCH]
+        points = baseline_requests(cell_lat[first[batch]], cell_lon[first[batch]], years)
+        climates = fetch_power(points, **fetch_options)
+        long = power_long([p[:2] for p in points], climates)
+        mean, std = daily_stats(long, cells[batch])
+        # a cell is only stored once every one of its requests succeeded; the rest are retried
+        # on the next run rather than saved with some baseline years missing
+        complete = ~np.array([c is None for c in climates]).reshape(len(batch), -1).any(axis=1)
+        got = complete & ~np.isnan(mean).all(axis=(1, 2))
+        climatology = climatology.extend(cells[batch][got], mean[got], std[got])
+        climatology.save(path)
+        if progress:
+            progress(done + len(batch), len(todo))
+    return climatology
+
+
+def add_anomalies(frame, climatology):
+    """Copy of ``frame`` with ``<var>_anom`` and ``<var>_z`` columns per climate variable."""
+    anomaly, z = climatology.anomalies(
+        frame["latitude"].to_numpy(), frame["longitude"].to_numpy(),
+        event_days(frame["date"]), frame[VARIABLES].to_numpy(np.float64)
+    )
+    out = frame.copy()
+    for j, name in enumerate(VARIABLES):
+        out[name + "_anom"] = anomaly[:, j]
+        out[name + "_z"] = z[:, j]
+    return out
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--dataset", default=store.DEFAULT_PATH)
+    parser.add_argument("--output", default=DEFAULT_PATH)
+    parser.add_argument("--years", type=int, nargs=2, default=BASELINE, metavar=("FIRST", "LAST"))
+    args = parser.parse_args()
+
+    frame = store.read_dataset(args.dataset, columns=["latitude", "longitude"])
+    climatology = ensure_climatology(
+        frame["latitude"], frame["longitude"], args.output, tuple(args.years),
+        progress=lambda done, total: print("%d/%d new cells" % (done, total))
+    )
+    print("%d cells in %s" % (len(climatology), args.output))
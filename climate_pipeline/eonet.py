@@ -0,0 +1,348 @@
+"""NASA EONET event ingestion with incremental, watermark-based sync.
+
+The first sync pulls a full snapshot. Every later sync asks EONET only for
+events active since the last watermark (``status=all`` so closures come
+through too), upserts them into a local SQLite event store and reports
+which events are new or changed, so enrichment can be limited to those.
+
+Responses are never materialised whole: ``iter_events`` decodes the
+``events`` array one object at a time from the streamed body, and
+``events_frame`` builds the DataFrame in fixed-size, typed chunks.
+"""
+import codecs
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pandas as pd
+import requests
+from pandas.api.types import union_categoricals
+
+from climate_pipeline import metrics
+from climate_pipeline.fetch import Fetcher
+
+EONET_URL = "https://eonet.gsfc.nasa.gov/api/v3/events"
+DEFAULT_PATH = os.path.join("data", "events.sqlite")
+FULL_PARAMS = {"status": "open", "limit": 5000}
+OVERLAP_DAYS = 2  # re-read a little before the watermark to absorb late edits
+CHUNK_ROWS = 10_000
+EVENT_COLUMNS = ["id", "title", "category", "date", "longitude", "latitude", "source", "digest"]
+
+EVENTS_START = re.compile(r'"events"\s*:\s*\[')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    id TEXT PRIMARY KEY,
+    digest TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    synced_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS enrichment (
+    id TEXT PRIMARY KEY,
+    digest TEXT NOT NULL,
+    payload TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+
+def digest(event):
+    return hashlib.sha1(json.dumps(event, sort_keys=True).encode()).hexdigest()
+
+
+def _batches(items, size):
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+# -----------------------------
+# Parsing
+# -----------------------------
+def point_coordinates(geo):
+    """``(lon, lat)`` of a geometry; polygons are reduced to their ring centroid."""
+    coords = geo["coordinates"]
+    if geo.get("type") == "Polygon":
+        ring = coords[0]
+        return sum(p[0] for p in ring) / len(ring), sum(p[1] for p in ring) / len(ring)
+    return coords[0], coords[1]
+
+
+def parse_event(e):
+    """Flatten one EONET event to its latest geometry, or None without one."""
+    if not e.get("geometry"):
+        return None
+    geo = e["geometry"][-1]
+    lon, lat = point_coordinates(geo)
+    return {
+        "id": e["id"],
+        "title": e["title"],
+        "category": e["categories"][0]["title"],
+        "date": geo["date"],
+        "longitude": lon,
+        "latitude": lat,
+        "source": e["sources"][0]["url"] if e.get("sources") else None
+    }
+
+
+def iter_events(chunks):
+    """Yield events one at a time from an iterable of JSON body chunks.
+
+    Only the object currently being decoded is held in memory, so a
+    5000-event (or 100k-event) payload never exists as one parsed tree.
+    """
+    decoder = json.JSONDecoder()
+    text = codecs.getincrementaldecoder("utf-8")()
+    buf, pos, in_array = "", 0, False
+    for chunk in chunks:
+        buf = buf[pos:] + (text.decode(chunk) if isinstance(chunk, bytes) else chunk)
+        pos = 0
+        if not in_array:
+            match = EVENTS_START.search(buf)
+            if not match:
+                continue
+            pos, in_array = match.end(), True
+        while True:
+            while pos < len(buf) and buf[pos] in " \t\r\n,":
+                pos += 1
+            if pos == len(buf):
+                break
+            if buf[pos] == "]":
+                return
+            try:
+                event, pos = decoder.raw_decode(buf, pos)
+            except json.JSONDecodeError:
+                break  # object continues in the next chunk
+            yield event
+    # no "events" array, or the body ended inside it: not a response to build on
+    raise ValueError("EONET response has no complete 'events' array")
+
+
+def typed_chunk(rows):
+    frame = pd.DataFrame(rows)
+    frame["category"] = frame["category"].astype("category")
+    frame["date"] = pd.to_datetime(frame["date"], utc=True, format="ISO8601")
+    frame["longitude"] = frame["longitude"].astype(np.float32)
+    frame["latitude"] = frame["latitude"].astype(np.float32)
+    return frame
+
+
+def concat_chunks(chunks, columns=EVENT_COLUMNS):
+    """Concatenate typed chunks without letting ``category`` decay to object."""
+    if not chunks:
+        return pd.DataFrame(columns=columns)
+    categories = union_categoricals([c["category"] for c in chunks]).categories
+    for c in chunks:
+        c["category"] = c["category"].cat.set_categories(categories)
+    return pd.concat(chunks, ignore_index=True)
+
+
+def events_frame(events, chunk_rows=CHUNK_ROWS):
+    """Build the typed event table from any iterable of raw events.
+
+    Rows are buffered ``chunk_rows`` at a time and converted straight to
+    categorical/float32/datetime64 columns.
+    """
+    chunks, rows = [], []
+    for e in events:
+        row = parse_event(e)
+        if row:
+            row["digest"] = digest(e)
+            rows.append(row)
+        if len(rows) == chunk_rows:
+            chunks.append(typed_chunk(rows))
+            rows = []
+    if rows:
+        chunks.append(typed_chunk(rows))
+    return concat_chunks(chunks)
+
+
+# -----------------------------
+# Local event store
+# -----------------------------
+class EventStore:
+
+    def __init__(self, path=DEFAULT_PATH):
+        self.path = path
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(SCHEMA)
+
+    def close(self):
+        self._db.close()
+
+    def meta(self, key):
+        with self._lock:
+            row = self._db.execute("SELECT value FROM meta WHERE key=?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def set_meta(self, key, value):
+        with self._lock:
+            if value is None:
+                self._db.execute("DELETE FROM meta WHERE key=?", (key,))
+            else:
+                self._db.execute("INSERT OR REPLACE INTO meta VALUES (?, ?)", (key, value))
+            self._db.commit()
+
+    def watermark(self):
+        return self.meta("watermark")
+
+    def set_watermark(self, value):
+        self.set_meta("watermark", value)
+
+    def synced_at(self):
+        """UTC time of the last successful sync, ISO formatted, or None."""
+        return self.meta("synced_at")
+
+    def upsert(self, events, batch=CHUNK_ROWS):
+        """Insert new events and replace changed ones.
+
+        Returns ``(new_ids, updated_ids)``; unchanged events are left alone.
+        ``events`` is consumed (and digested) outside the lock, which is
+        only held to write each ``batch``, so readers are not blocked for
+        a whole download. Batches already written stay if a later one
+        fails; the next sync rewrites them idempotently.
+        """
+        new, updated = [], []
+        for rows in _batches(events, batch):
+            now = time.time()
+            rows = {e["id"]: (e["id"], digest(e), json.dumps(e), now) for e in rows}
+            with self._lock:
+                known = {
+                    r[0]: r[1] for i in rows
+                    for r in self._db.execute("SELECT id, digest FROM events WHERE id=?", (i,)).fetchall()
+                }
+                changed = [row for i, row in rows.items() if known.get(i) != row[1]]
+                try:
+                    self._db.executemany("INSERT OR REPLACE INTO events VALUES (?, ?, ?, ?)", changed)
+                except Exception:
+                    self._db.rollback()
+                    raise
+                self._db.commit()
+            for row in changed:
+                (updated if row[0] in known else new).append(row[0])
+        return new, updated
+
+    def iter_events(self, batch=CHUNK_ROWS):
+        """Stream stored events in id order, ``batch`` rows per query."""
+        last = ""
+        while True:
+            with self._lock:
+                rows = self._db.execute(
+                    "SELECT id, payload FROM events WHERE id > ? ORDER BY id LIMIT ?", (last, batch)
+                ).fetchall()
+            if not rows:
+                return
+            for _, payload in rows:
+                yield json.loads(payload)
+            last = rows[-1][0]
+
+    def ids(self):
+        with self._lock:
+            return [r[0] for r in self._db.execute("SELECT id FROM events ORDER BY id")]
+
+    def events(self, ids):
+        with self._lock:
+            rows = [
+                r for i in ids
+                for r in self._db.execute("SELECT payload FROM events WHERE id=?", (i,)).fetchall()
+            ]
+        return [json.loads(r[0]) for r in rows]
+
+    def __len__(self):
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM events").fetchone()[0]
+
+    # -----------------------------
+    # Enrichment results
+    # -----------------------------
+    def get_enrichment(self, ids, digests):
+        """Stored climate for events whose digest still matches, by id."""
+        found = {}
+        with self._lock:
+            for i, d in zip(ids, digests):
+                row = self._db.execute(
+                    "SELECT payload FROM enrichment WHERE id=? AND digest=?", (i, d)
+                ).fetchone()
+                if row:
+                    found[i] = json.loads(row[0])
+        return found
+
+    def put_enrichment(self, rows):
+        """Store ``(id, digest, climate)`` rows."""
+        with self._lock:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO enrichment VALUES (?, ?, ?)",
+                [(i, d, json.dumps(climate)) for i, d, climate in rows]
+            )
+            self._db.commit()
+
+
+# -----------------------------
+# Sync
+# -----------------------------
+def sync_events(store, fetcher=None, url=EONET_URL, full_params=FULL_PARAMS, overlap_days=OVERLAP_DAYS):
+    """Pull a full snapshot on first run, deltas since the watermark after.
+
+    Returns a summary dict with the ids of new and updated events; the
+    watermark only advances when the pull succeeded.
+    """
+    started = datetime.now(timezone.utc).date()
+    watermark = store.watermark()
+    if watermark is None:
+        mode, params = "full", dict(full_params)
+    else:
+        since = datetime.strptime(watermark, "%Y-%m-%d").date() - timedelta(days=overlap_days)
+        mode = "delta"
+        params = {"status": "all", "start": since.isoformat(), "end": started.isoformat()}
+
+    failed = {"mode": mode, "ok": False, "fetched": 0, "new": [], "updated": [], "total": len(store)}
+    own_fetcher = fetcher is None
+    fetcher = fetcher or Fetcher(max_workers=1)
+    fetched = [0]
+
+    def counted(events):
+        for e in events:
+            fetched[0] += 1
+            yield e
+
+    try:
+        with metrics.stage("eonet.sync"):
+            chunks = fetcher.get_stream(url, params)
+            if chunks is None:
+                return failed
+            new, updated = store.upsert(counted(iter_events(chunks)))
+    except (requests.RequestException, ValueError):
+        return failed
+    finally:
+        metrics.count("eonet.events", fetched[0])
+        if own_fetcher:
+            fetcher.close()
+
+    store.set_watermark(started.isoformat())
+    store.set_meta("synced_at", datetime.now(timezone.utc).isoformat(timespec="seconds"))
+    return {
+        "mode": mode,
+        "ok": True,
+        "fetched": fetched[0],
+        "new": new,
+        "updated": updated,
+        "total": len(store)
+    }
@@ -0,0 +1,202 @@
+"""Bounded, rate-limited HTTP fetch engine for the NASA APIs.
+
+Requests run on a small thread pool over one pooled keep-alive session.
+Every host gets its own token bucket, and 429/5xx responses are retried
+with exponential backoff (honouring ``Retry-After`` when the server sends it).
+Every request has a timeout.
+
+``CLIMATE_API_BASE=http://127.0.0.1:8765`` sends every NASA request to
+that host instead (the mock server), and ``CLIMATE_REPLAY`` records or
+replays responses (see ``replay``); together they let both apps run with
+no network access.
+"""
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from climate_pipeline import metrics
+from climate_pipeline.replay import replay_mode, session_adapter
+
+DEFAULT_MAX_WORKERS = 8
+DEFAULT_RATE_PER_HOST = 10.0  # requests per second, 0 disables the limit
+DEFAULT_RETRIES = 4
+DEFAULT_BACKOFF = 0.5  # seconds, doubled on every retry
+DEFAULT_TIMEOUT = 30  # seconds
+
+RETRY_STATUS = {429, 500, 502, 503, 504}
+API_BASE_ENV = "CLIMATE_API_BASE"
+
+
+# -----------------------------
+# Rate limiting
+# -----------------------------
+class RateLimiter:
+    """Token bucket shared by every worker talking to the same host."""
+
+    def __init__(self, rate, burst=None):
+        self.rate = rate
+        self.capacity = burst or max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        if not self.rate:
+            return
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+# -----------------------------
+# Routing
+# -----------------------------
+def route(url):
+    """``url`` on the ``CLIMATE_API_BASE`` host when that is set."""
+    base = os.environ.get(API_BASE_ENV)
+    if not base:
+        return url
+    target = urlparse(base)
+    return urlparse(url)._replace(scheme=target.scheme, netloc=target.netloc).geturl()
+
+
+def api_source():
+    """Where NASA responses currently come from, for display."""
+    if replay_mode() == "replay":
+        return "replay archive"
+    return os.environ.get(API_BASE_ENV) or "live NASA APIs"
+
+
+# -----------------------------
+# Session + fetcher
+# -----------------------------
+def counted(chunks):
+    """Pass body chunks through, adding their size to ``http.bytes``."""
+    size = 0
+    try:
+        for chunk in chunks:
+            size += len(chunk)
+            yield chunk
+    finally:
+        metrics.count("http.bytes", size)
+
+
+def make_session(pool_size=DEFAULT_MAX_WORKERS):
+    session = requests.Session()
+    adapter = session_adapter(pool_size) or HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+class Fetcher:
+    """Fetch JSON documents concurrently with retries and per-host limits.
+
+    ``max_workers=1`` gives the old one-after-another behaviour, which the
+    benchmark uses as its serial baseline.
+    """
+
+    def __init__(self, max_workers=DEFAULT_MAX_WORKERS, rate_per_host=DEFAULT_RATE_PER_HOST,
+                 retries=DEFAULT_RETRIES, backoff=DEFAULT_BACKOFF, timeout=DEFAULT_TIMEOUT,
+                 session=None):
+        self.max_workers = max(1, int(max_workers))
+        self.rate_per_host = 0 if replay_mode() == "replay" else rate_per_host
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.session = session or make_session(self.max_workers)
+        self._limiters = {}
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.session.close()
+
+    def limiter(self, url):
+        host = urlparse(url).netloc
+        with self._lock:
+            if host not in self._limiters:
+                self._limiters[host] = RateLimiter(self.rate_per_host)
+            return self._limiters[host]
+
+    def retry_delay(self, attempt, response):
+        retry_after = response.headers.get("Retry-After") if response is not None else None
+        if retry_after and retry_after.isdigit():
+            return float(retry_after)
+        return self.backoff * (2 ** attempt) + random.uniform(0, self.backoff)
+
+    def get_json(self, url, params=None):
+        """Return the decoded JSON body, or None once retries are exhausted."""
+        url = route(url)
+        limiter = self.limiter(url)
+        for attempt in range(self.retries + 1):
+            limiter.acquire()
+            metrics.count("http.requests")
+            try:
+                r = self.session.get(url, params=params, timeout=self.timeout)
+            except (requests.ConnectionError, requests.Timeout):
+                r = None
+            if r is not None:
+                if r.status_code == 200:
+                    metrics.count("http.bytes", len(r.content))
+                    return r.json()
+                if r.status_code not in RETRY_STATUS:
+                    break
+            if attempt < self.retries:
+                metrics.count("http.retries")
+                time.sleep(self.retry_delay(attempt, r))
+        metrics.count("http.failures")
+        return None
+
+    def get_stream(self, url, params=None, chunk_size=1 << 16):
+        """Like ``get_json`` but return an iterator of raw body chunks.
+
+        Retries cover connecting and the status line only; the caller
+        decodes the body incrementally, so nothing is buffered here.
+        """
+        url = route(url)
+        limiter = self.limiter(url)
+        for attempt in range(self.retries + 1):
+            limiter.acquire()
+            metrics.count("http.requests")
+            try:
+                r = self.session.get(url, params=params, timeout=self.timeout, stream=True)
+            except (requests.ConnectionError, requests.Timeout):
+                r = None
+            if r is not None:
+                if r.status_code == 200:
+                    return counted(r.iter_content(chunk_size))
+                r.close()
+                if r.status_code not in RETRY_STATUS:
+                    break
+            if attempt < self.retries:
+                metrics.count("http.retries")
+                time.sleep(self.retry_delay(attempt, r))
+        metrics.count("http.failures")
+        return None
+
+    def map_json(self, jobs):
+        """Fetch ``(url, params)`` jobs, returning results in input order."""
+        jobs = list(jobs)
+        if self.max_workers == 1 or len(jobs) <= 1:
+            return [self.get_json(url, params) for url, params in jobs]
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            return list(pool.map(lambda job: self.get_json(*job), jobs))
@@ -0,0 +1,69 @@
+"""Server-side spatial binning for the event map.
+
+Points are assigned to pointy-top hexagons on the lon/lat plane (a pure
+NumPy stand-in for H3) whose size halves with every zoom level. The map
+then receives one marker per occupied hex with its event count and
+category mix, so the payload grows with the number of cells, not events.
+"""
+import numpy as np
+import pandas as pd
+
+BASE_SIZE = 8.0  # hex radius in degrees at zoom 0
+MAX_ZOOM = 6
+RAW_POINT_LIMIT = 5000  # above this the map switches to hexes by default
+SQRT3 = np.sqrt(3.0)
+KEY_OFFSET = 1 << 20
+
+
+def hex_size(zoom):
+    return BASE_SIZE / 2 ** int(np.clip(zoom, 0, MAX_ZOOM))
+
+
+def hex_cells(lat, lon, size):
+    """Axial ``(q, r)`` coordinates of the hex containing each point."""
+    x = np.asarray(lon, dtype=np.float64) / size
+    y = np.asarray(lat, dtype=np.float64) / size
+    q = SQRT3 / 3 * x - y / 3
+    r = 2 / 3 * y
+    # cube rounding: round all three axes, then fix the one that moved most
+    s = -q - r
+    rq, rr, rs = np.round(q), np.round(r), np.round(s)
+    dq, dr, ds = np.abs(rq - q), np.abs(rr - r), np.abs(rs - s)
+    fix_q = (dq > dr) & (dq > ds)
+    fix_r = ~fix_q & (dr > ds)
+    rq = np.where(fix_q, -rr - rs, rq)
+    rr = np.where(fix_r, -rq - rs, rr)
+    return rq.astype(np.int64), rr.astype(np.int64)
+
+
+def hex_centres(q, r, size):
+    """``(lat, lon)`` of hex centres."""
+    return size * 1.5 * r, size * (SQRT3 * q + SQRT3 / 2 * r)
+
+
+def bin_points(frame, zoom=2, lat="latitude", lon="longitude", category="category"):
+    """One row per occupied hex: centre, ``count``, dominant ``category``
+    and a count column per category (the mix)."""
+    if frame.empty:
+        return pd.DataFrame(columns=["latitude", "longitude", "count", "category"])
+    size = hex_size(zoom)
+    q, r = hex_cells(frame[lat], frame[lon], size)
+    cells, inverse = np.unique((q + KEY_OFFSET) * (2 * KEY_OFFSET) + (r + KEY_OFFSET), return_inverse=True)
+    cq, cr = cells // (2 * KEY_OFFSET) - KEY_OFFSET, cells % (2 * KEY_OFFSET) - KEY_OFFSET
+    centre_lat, centre_lon = hex_centres(cq, cr, size)
+
+    codes = pd.Categorical(frame[category])
+    names = list(codes.categories)
+    mix = np.bincount(
+        inverse * len(names) + codes.codes, minlength=len(cells) * len(names)
+    ).reshape(len(cells), len(names))
+
+    out = pd.DataFrame({
+        "latitude": np.clip(centre_lat, -90, 90),
+        "longitude": (centre_lon + 180) % 360 - 180,
+        "count": mix.sum(axis=1),
+        "category": pd.Categorical.from_codes(mix.argmax(axis=1), names)
+    })
+    for j, name in enumerate(names):
+        out[name] = mix[:, j]
+    return out
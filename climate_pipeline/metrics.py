@@ -0,0 +1,201 @@
+"""Lightweight instrumentation: stage timers, counters and peak memory.
+
+The pipeline wraps its stages in ``stage("power.fetch")`` and bumps
+counters such as ``http.requests`` or ``cache.hits``; ``snapshot()``
+returns everything recorded since the last ``reset()`` as a JSON-ready
+dict, which the apps show in their Performance panel and ``export_json``
+writes out for monitoring.
+
+Set ``CLIMATE_PROFILE`` to a comma-separated list of stage names (or
+``*``) to profile those stages with cProfile; ``CLIMATE_PROFILER=pyinstrument``
+uses pyinstrument instead when it is installed. Profiles are written to
+``data/profiles``. ``CLIMATE_METRICS=path.json`` makes the apps export
+every run's snapshot there.
+
+The registry is process-wide: with several Streamlit sessions running at
+once, the last run's figures include whatever the others did meanwhile.
+"""
+import cProfile
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+PROFILE_ENV = "CLIMATE_PROFILE"
+PROFILER_ENV = "CLIMATE_PROFILER"
+PROFILE_DIR = os.path.join("data", "profiles")
+EXPORT_ENV = "CLIMATE_METRICS"
+
+
+def rss_mb():
+    """Current resident set size of this process in MiB, or None if unknown (Linux only)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / (1 << 20)
+    except (OSError, ValueError):
+        return None
+
+
+def peak_rss_mb():
+    """Peak resident set size over the whole process lifetime in MiB, or None if unknown.
+
+    It never goes down, so it says nothing about a single run in a long-lived
+    server; ``snapshot`` also has the RSS at ``reset`` and now for that.
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1 << 20) if os.uname().sysname == "Darwin" else peak / 1024  # bytes vs KiB
+
+
+def stage_rows(snap):
+    """Stages of a snapshot as table rows, slowest first."""
+    rows = [dict(stage=name, **s) for name, s in snap["stages"].items()]
+    return sorted(rows, key=lambda r: -r["wall_s"])
+
+
+class Metrics:
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._profiling = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.started = time.time()
+            self.rss_start = rss_mb()
+            self.stages = {}
+            self.counters = {}
+            self.profiles = []
+
+    def count(self, name, n=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def record(self, name, wall, cpu):
+        with self._lock:
+            s = self.stages.setdefault(name, {"calls": 0, "wall_s": 0.0, "cpu_s": 0.0, "max_s": 0.0})
+            s["calls"] += 1
+            s["wall_s"] += wall
+            s["cpu_s"] += cpu
+            s["max_s"] = max(s["max_s"], wall)
+
+    @contextmanager
+    def stage(self, name):
+        """Time the enclosed block as ``name``; profile it if asked to.
+
+        ``cpu_s`` is process CPU time, so it includes the fetch threads a
+        stage waits on.
+        """
+        profiler = self._start_profile(name)
+        wall, cpu = time.perf_counter(), time.process_time()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - wall, time.process_time() - cpu)
+            if profiler:
+                self._stop_profile(name, profiler)
+
+    def snapshot(self):
+        with self._lock:
+            stages = {k: dict(v) for k, v in self.stages.items()}
+            counters = dict(self.counters)
+            profiles = list(self.profiles)
+        return {
+            "started": self.started,
+            "elapsed_s": time.time() - self.started,
+            "rss_start_mb": self.rss_start,
+            "rss_mb": rss_mb(),
+            "peak_rss_mb": peak_rss_mb(),
+            "stages": stages,
+            "counters": counters,
+            "profiles": profiles
+        }
+
+    def export_json(self, path):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path + ".tmp", "w") as f:
+            json.dump(self.snapshot(), f, indent=2)
+        os.replace(path + ".tmp", path)
+
+    # -----------------------------
+    # Profiling hook
+    # -----------------------------
+    def _start_profile(self, name):
+        wanted = os.environ.get(PROFILE_ENV, "")
+        if not wanted or (wanted != "*" and name not in wanted.split(",")):
+            return None
+        if not self._profiling.acquire(blocking=False):
+            return None  # one profiler at a time; nested or concurrent stages are covered by the outer one
+        if os.environ.get(PROFILER_ENV) == "pyinstrument":
+            try:
+                from pyinstrument import Profiler
+            except ImportError:
+                Profiler = None
+            if Profiler:
+                profiler = Profiler()
+                profiler.start()
+                return profiler
+        profiler = cProfile.Profile()
+        profiler.enable()
+        return profiler
+
+    def _stop_profile(self, name, profiler):
+        try:
+            os.makedirs(PROFILE_DIR, exist_ok=True)
+            base = os.path.join(PROFILE_DIR, "%s-%d" % (name, time.time() * 1000))
+            if isinstance(profiler, cProfile.Profile):
+                profiler.disable()
+                path = base + ".prof"
+                profiler.dump_stats(path)
+            else:
+                profiler.stop()
+                path = base + ".html"
+                with open(path, "w") as f:
+                    f.write(profiler.output_html())
+            with self._lock:
+                self.profiles.append(path)
+        finally:
+            self._profiling.release()
+
+
+METRICS = Metrics()
+stage = METRICS.stage
+count = METRICS.count
+snapshot = METRICS.snapshot
+reset = METRICS.reset
+export_json = METRICS.export_json
+
+
+def _mib(value):
+    return "%.0f MiB" % value if value else "unknown"
+
+
+def show_panel():
+    """End of a Streamlit run: export the snapshot if asked to, and the ``?perf=1`` panel.
+
+    Streamlit and pandas are imported here, so the pipeline itself never needs them.
+    """
+    import streamlit as st
+
+    if os.environ.get(EXPORT_ENV):
+        export_json(os.environ[EXPORT_ENV])
+    if not st.query_params.get("perf"):
+        return
+    import pandas as pd
+    snap = snapshot()
+    with st.sidebar.expander("Performance", expanded=True):
+        st.caption("Last run: %.2f s, RSS %s -> %s (process peak %s)" % (
+            snap["elapsed_s"], _mib(snap["rss_start_mb"]), _mib(snap["rss_mb"]), _mib(snap["peak_rss_mb"])
+        ))
+        st.dataframe(pd.DataFrame(stage_rows(snap)), hide_index=True)
+        st.json(snap["counters"])
+        st.download_button("Export JSON", json.dumps(snap, indent=2), "metrics.json", "application/json")
@@ -0,0 +1,203 @@
+"""Local stand-in for the NASA POWER daily point and EONET events APIs.
+
+Serves deterministic synthetic climate values and events -- or, with
+``--archive``, responses recorded by ``replay`` -- with a configurable
+delay and an injected error rate, so fetch throughput and retry handling
+can be measured without touching the real services. Point both apps at
+it with ``CLIMATE_API_BASE``::
+
+    python -m climate_pipeline.mock_server --port 8765 --latency 0.2 --error-rate 0.05
+    CLIMATE_API_BASE=http://127.0.0.1:8765 streamlit run main.py
+"""
+import argparse
+import json
+import math
+import random
+import threading
+import time
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from climate_pipeline.replay import Archive, request_key
+
+POWER_PATH = "/api/temporal/daily/point"
+EONET_PATH = "/api/v3/events"
+DEFAULT_EVENTS = 1000
+
+
+def synthetic_power(lat, lon, start, end, parameters):
+    day = datetime.strptime(start, "%Y%m%d")
+    last = datetime.strptime(end, "%Y%m%d")
+    series = {p: {} for p in parameters}
+    while day <= last:
+        key = day.strftime("%Y%m%d")
+        season = math.cos(2 * math.pi * (day.timetuple().tm_yday - 200) / 365.25)
+        temp = 28 - 0.45 * abs(lat) + 10 * season * (1 if lat >= 0 else -1)
+        values = {
+            "T2M": round(temp, 2),
+            "RH2M": round(50 + 30 * math.sin(lon / 25 + day.toordinal() / 7), 2),
+            "WS2M": round(3 + 2 * math.sin(lat * lon / 500 + day.toordinal()), 2),
+            "PRECTOTCORR": round(max(0.0, 6 * math.sin(day.toordinal() / 3 + lat)), 2),
+        }
+        for p in parameters:
+            series[p][key] = values.get(p, -999)
+        day += timedelta(days=1)
+    return {"properties": {"parameter": series}}
+
+
+CATEGORIES = [
+    ("wildfires", "Wildfires", 0.80),
+    ("severeStorms", "Severe Storms", 0.08),
+    ("volcanoes", "Volcanoes", 0.05),
+    ("seaLakeIce", "Sea and Lake Ice", 0.04),
+    ("floods", "Floods", 0.03),
+]
+
+
+def synthetic_events(n, seed=42, max_track=1):
+    """Yield ``n`` EONET-shaped events, wildfire-dominated like the real feed.
+
+    Each event gets a geometry track of 1..``max_track`` daily points.
+    """
+    rng = random.Random(seed)
+    weights = [c[2] for c in CATEGORIES]
+    start = datetime(2024, 1, 1)
+    for i in range(n):
+        cat_id, cat_title, _ = rng.choices(CATEGORIES, weights)[0]
+        lat, lon = rng.uniform(-60, 70), rng.uniform(-180, 180)
+        day = start + timedelta(days=rng.randint(0, 600), minutes=rng.randint(0, 1439))
+        geometry = []
+        for _ in range(rng.randint(1, max_track)):
+            geometry.append({
+                "magnitudeValue": None,
+                "magnitudeUnit": None,
+                "date": day.strftime("%Y-%m-%dT%H:%M:%SZ"),
+                "type": "Point",
+                "coordinates": [round(lon, 6), round(lat, 6)]
+            })
+            lat = max(-89.0, min(89.0, lat + rng.gauss(0, 0.3)))
+            lon = (lon + rng.gauss(0, 0.3) + 180) % 360 - 180
+            day += timedelta(days=1)
+        yield {
+            "id": "EONET_%d" % (100000 + i),
+            "title": "%s %d" % (cat_title, i),
+            "description": None,
+            "link": "https://eonet.gsfc.nasa.gov/api/v3/events/EONET_%d" % (100000 + i),
+            "closed": None,
+            "categories": [{"id": cat_id, "title": cat_title}],
+            "sources": [{"id": "GDACS", "url": "https://www.gdacs.org/report.aspx?eventid=%d" % i}],
+            "geometry": geometry
+        }
+
+
+EVENTS_HEAD = '{"title": "EONET Events", "link": "https://eonet.gsfc.nasa.gov/api/v3/events", "events": ['
+
+
+def write_events(path, events):
+    """Write events as an EONET response body without holding them all."""
+    with open(path, "w") as f:
+        f.write(EVENTS_HEAD)
+        for i, e in enumerate(events):
+            f.write(("," if i else "") + json.dumps(e))
+        f.write("]}")
+
+
+class MockHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, so pooled sessions behave as in production
+    disable_nagle_algorithm = True
+    latency = 0.0
+    error_rate = 0.0
+    events = DEFAULT_EVENTS
+    archive = None
+    rng = None
+    rng_lock = None
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = {k: v[0] for k, v in parse_qs(url.query).items()}
+        if self.latency:
+            time.sleep(self.latency)
+        if self.error_rate:
+            with self.rng_lock:
+                fail = self.rng.random() < self.error_rate
+            if fail:
+                return self.send_json(503, {"error": "injected failure"}, {"Retry-After": "0"})
+        if self.archive is not None:
+            hit = self.archive.get(request_key(self.path))
+            if hit is None:
+                return self.send_json(404, {"error": "not recorded"})
+            return self.send_body(200, hit[0] or "application/json", hit[1])
+        if url.path == EONET_PATH:
+            return self.send_events(int(query.get("limit", self.events)))
+        if url.path != POWER_PATH:
+            return self.send_json(404, {"error": "unknown path"})
+        parameters = [
+            "PRECTOTCORR" if p == "PRECTOT" else p
+            for p in query.get("parameters", "").split(",") if p
+        ]
+        body = synthetic_power(
+            float(query["latitude"]), float(query["longitude"]),
+            query["start"], query["end"], parameters
+        )
+        self.send_json(200, body)
+
+    def send_events(self, limit):
+        events = synthetic_events(min(limit, self.events))
+        payload = EVENTS_HEAD + ",".join(json.dumps(e) for e in events) + "]}"
+        self.send_body(200, "application/json", payload.encode())
+
+    def send_json(self, status, body, headers=None):
+        self.send_body(status, "application/json", json.dumps(body).encode(), headers)
+
+    def send_body(self, status, content_type, payload, headers=None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(payload)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+def serve(host="127.0.0.1", port=0, latency=0.0, error_rate=0.0, events=DEFAULT_EVENTS, archive=None, seed=0):
+    """Start the mock server on a daemon thread and return it.
+
+    ``error_rate`` is the share of requests answered with a 503;
+    ``events`` is the size of the synthetic EONET feed; ``archive`` (an
+    ``replay.Archive`` or its path) serves recorded responses instead of
+    synthetic ones. ``server.base_url`` holds the root URL, e.g.
+    ``http://127.0.0.1:53211``.
+    """
+    if isinstance(archive, str):
+        archive = Archive(archive)
+    handler = type("Handler", (MockHandler,), {
+        "latency": latency, "error_rate": error_rate, "events": events, "archive": archive,
+        "rng": random.Random(seed), "rng_lock": threading.Lock()
+    })
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    server.base_url = "http://%s:%d" % server.server_address[:2]
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every response")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of requests answered with a 503")
+    parser.add_argument("--events", type=int, default=DEFAULT_EVENTS, help="size of the synthetic EONET feed")
+    parser.add_argument("--archive", help="serve responses recorded with CLIMATE_REPLAY=record")
+    args = parser.parse_args()
+    server = serve(args.host, args.port, args.latency, args.error_rate, args.events, args.archive)
+    print("Mock NASA server on", server.base_url, "(%s, %s)" % (POWER_PATH, EONET_PATH))
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
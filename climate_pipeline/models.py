@@ -0,0 +1,225 @@
+"""Climate-feature models behind the Models tab.
+
+K-Means, PCA, a decision tree, Naive Bayes and a linear SVM are fitted on
+temp/humidity/wind/precip. The feature matrix is built once per dataset
+as a C-contiguous float32 array, and the fitted bundle is saved under a
+hash of that matrix, so the same data is never trained twice.
+
+When a new dataset only adds events, the incremental models
+(MiniBatchKMeans, IncrementalPCA, GaussianNB, SGD linear SVM) are updated
+with ``partial_fit`` on the new rows; anything else triggers a full fit.
+``TrainingWorker`` runs training on a background thread.
+"""
+import glob
+import hashlib
+import os
+import threading
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.cluster import MiniBatchKMeans
+from sklearn.decomposition import IncrementalPCA
+from sklearn.linear_model import SGDClassifier
+from sklearn.naive_bayes import GaussianNB
+from sklearn.preprocessing import StandardScaler
+from sklearn.tree import DecisionTreeClassifier
+
+from climate_pipeline.enrich import VARIABLES
+
+DEFAULT_PATH = os.path.join("data", "models")
+LEADERBOARD = os.path.join(DEFAULT_PATH, "leaderboard.csv")  # written by ``python -m climate_pipeline.search``
+SEED = 42
+HOLDOUT_BUCKETS = 5  # ids hashing to bucket 0 are held out for scoring
+THROUGHPUT_ROWS = 100_000
+KEEP_BUNDLES = 3
+
+# name -> (factory, updated with partial_fit when only new events arrive)
+MODELS = {
+    "K-Means": (lambda: MiniBatchKMeans(n_clusters=5, batch_size=4096, n_init=3, random_state=SEED), True),
+    "PCA": (lambda: IncrementalPCA(n_components=2, batch_size=4096), True),
+    "Decision Tree": (lambda: DecisionTreeClassifier(max_depth=6, random_state=SEED), False),
+    "Naive Bayes": (lambda: GaussianNB(), True),
+    "SVM": (lambda: SGDClassifier(loss="hinge", alpha=1e-4, random_state=SEED), True)
+}
+CLASSIFIERS = ("Decision Tree", "Naive Bayes", "SVM")
+
+
+# -----------------------------
+# Features
+# -----------------------------
+def features(frame):
+    """``(ids, X, y)`` sorted by id, with ``X`` C-contiguous float32."""
+    frame = frame.dropna(subset=VARIABLES).sort_values("id", kind="stable")
+    ids = frame["id"].to_numpy().astype(str)
+    X = np.ascontiguousarray(frame[VARIABLES].to_numpy(np.float32))
+    y = frame["category"].astype(str).to_numpy().astype(str)
+    return ids, X, y
+
+
+def dataset_hash(ids, X, y):
+    h = hashlib.sha1()
+    h.update("\n".join(ids).encode())
+    h.update(X.tobytes())
+    h.update("\n".join(y).encode())
+    return h.hexdigest()[:16]
+
+
+def holdout_mask(ids):
+    """Stable by id, so an event stays on the same side across refits."""
+    return np.fromiter((zlib.crc32(i.encode()) % HOLDOUT_BUCKETS == 0 for i in ids), bool, len(ids))
+
+
+def new_rows(previous, ids, X, y):
+    """Positions of events added since ``previous``, or None when any
+    earlier event changed or disappeared."""
+    pos = np.searchsorted(ids, previous["ids"])
+    if (pos >= len(ids)).any() or (ids[np.minimum(pos, len(ids) - 1)] != previous["ids"]).any():
+        return None
+    if not (np.array_equal(X[pos], previous["X"]) and np.array_equal(y[pos], previous["y"])):
+        return None
+    added = np.ones(len(ids), dtype=bool)
+    added[pos] = False
+    return np.flatnonzero(added)
+
+
+# -----------------------------
+# Training
+# -----------------------------
+def _fit(name, model, X, y, incremental):
+    if name in ("K-Means", "PCA"):
+        model.partial_fit(X) if incremental else model.fit(X)
+    elif incremental:
+        model.partial_fit(X, y, classes=model.classes_)
+    else:
+        model.fit(X, y)
+    return model
+
+
+def _score(name, model, X, y):
+    if name == "K-Means":
+        return "inertia / event", float(-model.score(X) / max(len(X), 1))
+    if name == "PCA":
+        return "explained variance", float(model.explained_variance_ratio_.sum())
+    return "holdout accuracy", float((model.predict(X) == y).mean()) if len(X) else float("nan")
+
+
+def _throughput(name, model, X):
+    batch = np.ascontiguousarray(np.resize(X, (max(len(X), THROUGHPUT_ROWS), X.shape[1])))
+    infer = model.transform if name == "PCA" else model.predict
+    start = time.perf_counter()
+    infer(batch)
+    return len(batch) / (time.perf_counter() - start)
+
+
+def train_models(frame, path=DEFAULT_PATH):
+    """Fit (or load, or incrementally update) every model for ``frame``.
+
+    Returns the bundle: the scaler, the fitted models and a ``report``
+    with fit mode, fit time, inference throughput and a score per model.
+    """
+    ids, X, y = features(frame)
+    key = dataset_hash(ids, X, y)
+    cached = load_bundle(key, path)
+    if cached:
+        cached["report"] = [dict(row, mode="cached") for row in cached["report"]]
+        return cached
+
+    test = holdout_mask(ids)
+    previous = latest_bundle(path)
+    added = new_rows(previous, ids, X, y) if previous else None
+    if added is not None:
+        added = added[~test[added]]
+        if not set(y[added]) <= set(previous["classes"]):
+            added = None  # classifiers cannot learn a new category with partial_fit
+    classes = previous["classes"] if added is not None else np.unique(y[~test])
+
+    # the scaler stays frozen across incremental updates so earlier fits remain valid
+    scaler = previous["scaler"] if added is not None else StandardScaler().fit(X[~test])
+    Xs = np.ascontiguousarray(scaler.transform(X), dtype=np.float32)
+    models, report = {}, []
+    for name, (factory, incremental) in MODELS.items():
+        update = added is not None and incremental
+        rows = added if update else np.flatnonzero(~test)
+        model = previous["models"][name] if update else factory()
+        start = time.perf_counter()
+        if not update or len(rows) >= (2 if name == "PCA" else 1):
+            _fit(name, model, Xs[rows], y[rows], update)
+        fit_s = time.perf_counter() - start
+        metric, score = _score(name, model, Xs[test] if name in CLASSIFIERS else Xs, y[test])
+        models[name] = model
+        report.append({
+            "model": name,
+            "mode": "incremental" if update else "full",
+            "rows": int(len(rows)),
+            "fit_s": fit_s,
+            "rows_per_s": _throughput(name, model, Xs),
+            "metric": metric,
+            "score": score
+        })
+
+    bundle = {
+        "key": key, "ids": ids, "X": X, "y": y, "classes": classes,
+        "scaler": scaler, "models": models, "report": report
+    }
+    save_bundle(bundle, path)
+    return bundle
+
+
+# -----------------------------
+# Registry
+# -----------------------------
+def load_bundle(key, path=DEFAULT_PATH):
+    name = os.path.join(path, key + ".joblib")
+    return joblib.load(name) if os.path.exists(name) else None
+
+
+def latest_bundle(path=DEFAULT_PATH):
+    names = sorted(glob.glob(os.path.join(path, "*.joblib")), key=os.path.getmtime)
+    return joblib.load(names[-1]) if names else None
+
+
+def save_bundle(bundle, path=DEFAULT_PATH):
+    os.makedirs(path, exist_ok=True)
+    name = os.path.join(path, bundle["key"] + ".joblib")
+    joblib.dump(bundle, name + ".tmp")
+    os.replace(name + ".tmp", name)
+    for old in sorted(glob.glob(os.path.join(path, "*.joblib")), key=os.path.getmtime)[:-KEEP_BUNDLES]:
+        os.remove(old)
+
+
+def predict(bundle, frame):
+    """Cluster, 2-D projection and per-classifier category for new rows."""
+    Xs = np.ascontiguousarray(bundle["scaler"].transform(frame[VARIABLES].to_numpy(np.float32)), dtype=np.float32)
+    models = bundle["models"]
+    out = pd.DataFrame(models["PCA"].transform(Xs), columns=["pc1", "pc2"], index=frame.index)
+    out["cluster"] = models["K-Means"].predict(Xs)
+    for name in CLASSIFIERS:
+        out[name] = models[name].predict(Xs)
+    return out
+
+
+# -----------------------------
+# Background worker
+# -----------------------------
+class TrainingWorker:
+    """Trains on one background thread, at most one job per dataset version.
+
+    The UI submits and polls; it never blocks on a fit.
+    """
+
+    def __init__(self, path=DEFAULT_PATH):
+        self.path = path
+        self._pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="train-models")
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def submit(self, version, load):
+        """Future for ``version``; ``load()`` is called on the worker to read the data."""
+        with self._lock:
+            if version not in self._jobs:
+                self._jobs[version] = self._pool.submit(lambda: train_models(load(), self.path))
+            return self._jobs[version]
@@ -0,0 +1,132 @@
+"""Resumable, bounded-memory build of the combined event + climate dataset.
+
+Events are read from the local event store in fixed-size id batches,
+enriched, and written straight into the Parquet staging directory, so
+only one batch is ever in memory. After every batch a checkpoint is
+saved in the event store's meta table; a build that dies at event 8,000
+picks up from the batch after the last checkpoint instead of starting
+over. Climate already stored for an event version is never fetched again.
+
+    summary = build_dataset(EventStore(), sample_size=None, cache=ClimateCache())
+"""
+import hashlib
+import json
+
+import numpy as np
+import pandas as pd
+
+from climate_pipeline import metrics, store
+from climate_pipeline.enrich import VARIABLES, enrich_events
+from climate_pipeline.eonet import events_frame
+
+BATCH_SIZE = 2000
+SAMPLE_SEED = 42
+CHECKPOINT_KEY = "build_checkpoint"
+
+
+def select_ids(ids, sample_size=None, seed=SAMPLE_SEED):
+    """All ``ids`` in order, or a reproducible random ``sample_size`` of them."""
+    ids = sorted(ids)
+    if sample_size is None or sample_size >= len(ids):
+        return ids
+    picked = np.random.default_rng(seed).choice(len(ids), int(sample_size), replace=False)
+    return [ids[i] for i in np.sort(picked)]
+
+
+def merge_reports(reports):
+    """Sum the planner reports of every batch into one."""
+    total = {"events": 0, "naive_requests": 0, "planned_requests": 0, "grid_cells": 0}
+    for r in reports:
+        for key in total:
+            total[key] += r[key]
+    total["reduction"] = total["naive_requests"] / total["planned_requests"] if total["planned_requests"] else 0.0
+    return total
+
+
+def enrich_stored(events, event_store, features=(), **fetch_options):
+    """Attach climate, reusing what the event store holds for each event digest.
+
+    Only new or changed events are enriched; their results are stored
+    before returning, which is what makes a batch a checkpoint. Stored
+    climate that lacks any of the requested ``features`` is redone.
+    """
+    columns = VARIABLES + [f.name for f in features]
+    stored = event_store.get_enrichment(events["id"], events["digest"])
+    stored = {i: c for i, c in stored.items() if all(name in c for name in columns)}
+    todo = events[~events["id"].isin(stored)]
+
+    fresh, report = enrich_events(todo, features=features, **fetch_options)
+    fresh = fresh.dropna(subset=VARIABLES, how="all")
+    event_store.put_enrichment(zip(fresh["id"], fresh["digest"], fresh[columns].to_dict("records")))
+
+    climate = pd.concat([
+        pd.DataFrame.from_dict(stored, orient="index", columns=columns, dtype=float),
+        fresh.set_index("id")[columns]
+    ])
+    return events.merge(climate, left_on="id", right_index=True), report
+
+
+def clean(combined):
+    combined = combined.copy()
+    combined["date"] = pd.to_datetime(combined["date"])
+    return combined.drop(columns="digest").dropna()
+
+
+# -----------------------------
+# Checkpointed build
+# -----------------------------
+def build_dataset(event_store, path=store.DEFAULT_PATH, sample_size=None, batch_size=BATCH_SIZE,
+                  progress=None, features=(), **fetch_options):
+    """Enrich the selected events batch by batch and publish them as the dataset.
+
+    ``sample_size=None`` is full mode (every event with geometry).
+    ``features`` adds ``enrich.WindowFeature`` columns next to the
+    same-day climate.
+    ``progress(done, total)`` is called after each batch. A checkpoint
+    left by an interrupted build with the same selection is resumed.
+    Returns a summary dict; the dataset is only swapped in when
+    ``rows`` is non-zero.
+    """
+    ids = select_ids(event_store.ids(), sample_size)
+    selection = hashlib.sha1("\n".join(ids).encode()).hexdigest()
+
+    checkpoint = json.loads(event_store.meta(CHECKPOINT_KEY) or "null")
+    run = [selection, path, batch_size, [f.name for f in features]]
+    resume = bool(checkpoint) and checkpoint["run"] == run
+    done = checkpoint["done"] if resume else 0
+    writer = store.DatasetWriter(path, resume=resume)
+    writer.rows = checkpoint["rows"] if resume else 0
+    reports = []
+    if progress:
+        progress(done, len(ids))
+
+    for start in range(done, len(ids), batch_size):
+        batch = ids[start:start + batch_size]
+        with metrics.stage("build.events"):
+            events = events_frame(event_store.events(batch))
+        if not events.empty:
+            with metrics.stage("build.enrich"):
+                combined, report = enrich_stored(events, event_store, features, **fetch_options)
+            reports.append(report)
+            with metrics.stage("build.write"):
+                writer.write(clean(combined), start // batch_size)
+        done = start + len(batch)
+        event_store.set_meta(CHECKPOINT_KEY, json.dumps(
+            {"run": run, "done": done, "rows": writer.rows}
+        ))
+        if progress:
+            progress(done, len(ids))
+
+    summary = {
+        "events": len(ids),
+        "resumed_from": checkpoint["done"] if resume else 0,
+        "rows": writer.rows,
+        "report": merge_reports(reports)
+    }
+    if writer.rows:
+        with metrics.stage("build.commit"):
+            writer.commit(sample_size=sample_size, features=run[-1], synced_at=event_store.synced_at())
+    else:
+        writer.discard()
+    event_store.set_meta(CHECKPOINT_KEY, None)
+    return summary
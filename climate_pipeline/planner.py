@@ -0,0 +1,112 @@
+"""Plan POWER requests per grid cell instead of per event.
+
+POWER's daily point endpoint returns a whole date range for one location,
+and its meteorology is on a 0.5° x 0.625° grid, so every event inside a
+cell gets identical values. Events are snapped to their cell, overlapping
+or nearby date windows inside a cell are merged into one ranged
+request, and the daily values are sliced back out per event afterwards.
+"""
+from collections import namedtuple
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from climate_pipeline.power import fetch_power
+
+GRID_LAT = 0.5
+GRID_LON = 0.625
+LON_CELLS = int(360 / GRID_LON) + 1
+MAX_GAP_DAYS = 30  # extra days in a response are far cheaper than another request
+MAX_SPAN_DAYS = 366  # keep single responses bounded
+
+PlannedRequest = namedtuple("PlannedRequest", "lat lon start end members")
+
+
+def snap_to_grid(lat, lon):
+    """Centre of the POWER grid cell containing (lat, lon)."""
+    return (
+        round(round(float(lat) / GRID_LAT) * GRID_LAT, 4),
+        round(round(float(lon) / GRID_LON) * GRID_LON, 4)
+    )
+
+
+def snap_arrays(lat, lon):
+    """Vectorised ``snap_to_grid`` over coordinate arrays."""
+    lat = np.round(np.round(np.asarray(lat, dtype=np.float64) / GRID_LAT) * GRID_LAT, 4)
+    lon = np.round(np.round(np.asarray(lon, dtype=np.float64) / GRID_LON) * GRID_LON, 4)
+    return lat, lon
+
+
+def grid_cells(lat, lon):
+    """Integer id of the POWER cell containing each point."""
+    row = np.round(np.asarray(lat, dtype=np.float64) / GRID_LAT).astype(np.int64) + int(90 / GRID_LAT)
+    col = np.round(np.asarray(lon, dtype=np.float64) / GRID_LON).astype(np.int64) + int(180 / GRID_LON)
+    return row * LON_CELLS + col
+
+
+def _day(value):
+    return datetime(int(value[:4]), int(value[4:6]), int(value[6:8]))
+
+
+def plan_requests(points, max_gap_days=MAX_GAP_DAYS, max_span_days=MAX_SPAN_DAYS):
+    """Group ``(lat, lon, start, end)`` points into ranged per-cell requests.
+
+    ``members`` on each ``PlannedRequest`` lists the indices of the points
+    it covers.
+    """
+    cells = {}
+    for i, (lat, lon, start, end) in enumerate(points):
+        cells.setdefault(snap_to_grid(lat, lon), []).append((_day(start), _day(end), i))
+
+    plan = []
+    max_gap = timedelta(days=max_gap_days + 1)
+    for (lat, lon), windows in cells.items():
+        windows.sort()
+        first, last, members = None, None, []
+        for start, end, i in windows:
+            if members and start <= last + max_gap and (max(last, end) - first).days < max_span_days:
+                last = max(last, end)
+                members.append(i)
+                continue
+            if members:
+                plan.append(PlannedRequest(lat, lon, first.strftime("%Y%m%d"), last.strftime("%Y%m%d"), members))
+            first, last, members = start, end, [i]
+        plan.append(PlannedRequest(lat, lon, first.strftime("%Y%m%d"), last.strftime("%Y%m%d"), members))
+    return plan
+
+
+def fan_out(points, plan, climates):
+    """Slice each planned response back to the window of every member point."""
+    results = [None] * len(points)
+    for request, climate in zip(plan, climates):
+        if climate is None:
+            continue
+        for i in request.members:
+            start, end = points[i][2], points[i][3]
+            results[i] = {
+                name: {d: v for d, v in series.items() if start <= d <= end}
+                for name, series in climate.items()
+            }
+    return results
+
+
+def plan_report(points, plan):
+    cells = {(r.lat, r.lon) for r in plan}
+    return {
+        "events": len(points),
+        "naive_requests": len(points),
+        "planned_requests": len(plan),
+        "grid_cells": len(cells),
+        "reduction": len(points) / len(plan) if plan else 0.0
+    }
+
+
+def fetch_planned(points, **fetch_options):
+    """Plan, fetch and fan out. Returns ``(climates, report)``.
+
+    ``fetch_options`` are passed through to ``power.fetch_power``.
+    """
+    points = list(points)
+    plan = plan_requests(points)
+    climates = fetch_power([(r.lat, r.lon, r.start, r.end) for r in plan], **fetch_options)
+    return fan_out(points, plan, climates), plan_report(points, plan)
@@ -0,0 +1,83 @@
+"""NASA POWER daily point lookups."""
+from climate_pipeline.fetch import Fetcher
+
+POWER_URL = "https://power.larc.nasa.gov/api/temporal/daily/point"
+PARAMETERS = "T2M,RH2M,WS2M,PRECTOT"
+
+# POWER parameter -> column name used throughout the project
+COLUMNS = {"T2M": "temp", "RH2M": "humidity", "WS2M": "wind", "PRECTOT": "precip"}
+# POWER answers PRECTOT requests under its bias-corrected name
+ALIASES = {"PRECTOTCORR": "PRECTOT"}
+FILL_VALUE = -999
+
+
+def power_params(lat, lon, start, end, parameters=PARAMETERS):
+    return {
+        "parameters": parameters,
+        "community": "RE",
+        "longitude": lon,
+        "latitude": lat,
+        "start": start,
+        "end": end,
+        "format": "JSON"
+    }
+
+
+def parse_daily(js):
+    """Return ``{column: {YYYYMMDD: value}}`` from a POWER point response.
+
+    Series are passed through untouched; missing days keep POWER's
+    ``FILL_VALUE`` and become NaN in ``enrich.power_long``.
+    """
+    climate = {}
+    for key, series in js["properties"]["parameter"].items():
+        name = COLUMNS.get(ALIASES.get(key, key))
+        if name:
+            climate[name] = series
+    return climate
+
+
+def fetch_power(points, fetcher=None, url=POWER_URL, cache=None, offline=False, **fetch_options):
+    """Fetch ``(lat, lon, start, end)`` points concurrently.
+
+    Returns one parsed ``parse_daily`` dict per point, in order, with None
+    for points whose request failed. With a ``ClimateCache`` only points
+    with uncached days reach the network; ``offline=True`` answers from the
+    cache alone and never opens a connection.
+    """
+    points = list(points)
+    results = [None] * len(points)
+    pending = {}
+    for i, (lat, lon, start, end) in enumerate(points):
+        if cache is not None:
+            lat, lon = cache.snap(lat, lon)
+            climate, complete = cache.get_range(lat, lon, start, end, PARAMETERS, stale_ok=offline)
+            if complete or offline:
+                results[i] = climate
+                continue
+        if not offline:
+            pending.setdefault((lat, lon, start, end), []).append(i)
+    if not pending:
+        return results
+
+    keys = list(pending)
+    jobs = [(url, power_params(*key)) for key in keys]
+    own_fetcher = fetcher is None
+    fetcher = fetcher or Fetcher(**fetch_options)
+    try:
+        responses = fetcher.map_json(jobs)
+    finally:
+        if own_fetcher:
+            fetcher.close()
+
+    for key, js in zip(keys, responses):
+        if not js:
+            continue
+        climate = parse_daily(js)
+        if cache is not None:
+            cache.put_range(key[0], key[1], climate, PARAMETERS, fill_value=FILL_VALUE)
+        for i in pending[key]:
+            results[i] = climate
+    if cache is not None:
+        cache.evict()
+    return results
@@ -0,0 +1,166 @@
+"""Background dataset refresh, one run at a time across processes.
+
+A refresh syncs EONET, enriches new and changed events and commits a new
+dataset version. ``RefreshWorker`` runs refreshes on a daemon thread,
+whenever the live dataset gets ``interval`` seconds old or the UI asks.
+Readers keep serving the current version until the new one is swapped
+in, i.e. stale-while-revalidate.
+
+A lock file next to the dataset (``data/dataset.lock``) makes any other
+refresh skip rather than repeat the NASA round-trip. That covers a
+second app process, or a cron job running
+``python -m climate_pipeline refresh``.
+"""
+import os
+import threading
+import time
+
+from climate_pipeline import metrics, store
+from climate_pipeline.enrich import parse_features
+from climate_pipeline.eonet import sync_events
+from climate_pipeline.pipeline import build_dataset
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+DEFAULT_INTERVAL = 6 * 3600  # seconds a dataset stays fresh
+
+
+def lock_path(path=store.DEFAULT_PATH):
+    return path + ".lock"
+
+
+class FileLock:
+    """Exclusive lock on a file; other processes and other ``FileLock`` objects are kept out."""
+
+    def __init__(self, path):
+        self.path = path
+        self._file = None
+
+    def acquire(self, blocking=False):
+        """True once held; False right away when busy and not ``blocking``."""
+        if os.path.dirname(self.path):
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        f = open(self.path, "a+")
+        try:
+            if fcntl:
+                fcntl.flock(f, fcntl.LOCK_EX | (0 if blocking else fcntl.LOCK_NB))
+            else:
+                msvcrt.locking(f.fileno(), msvcrt.LK_LOCK if blocking else msvcrt.LK_NBLCK, 1)
+        except OSError:
+            f.close()
+            return False
+        self._file = f
+        return True
+
+    def release(self):
+        if fcntl:
+            fcntl.flock(self._file, fcntl.LOCK_UN)
+        else:
+            self._file.seek(0)
+            msvcrt.locking(self._file.fileno(), msvcrt.LK_UNLCK, 1)
+        self._file.close()
+        self._file = None
+
+
+def refresh(event_store, path=store.DEFAULT_PATH, offline=False, wait=False, missing_only=False, force=False,
+            **build_options):
+    """Sync EONET and commit a new dataset version under the refresh lock.
+
+    ``build_options`` go to ``pipeline.build_dataset``; a ``sample_size``
+    or ``features`` not given keeps the live dataset's. Returns None when
+    nothing ran: another refresh holds the lock (and ``wait`` is False),
+    or ``missing_only`` is set and a dataset appeared while waiting.
+    Otherwise returns the build summary plus ``built`` and ``sync`` (the
+    ``sync_events`` summary, None offline). An existing dataset is only
+    rebuilt when the event store changed since it was built, or with
+    ``force``; a failed or empty sync leaves it as it is.
+    """
+    lock = FileLock(lock_path(path))
+    if not lock.acquire(blocking=wait):
+        metrics.count("refresh.skipped")
+        return None
+    try:
+        if missing_only and store.exists(path):
+            return None
+        built_from = None
+        if store.exists(path):
+            meta = store.manifest(path)
+            built_from = meta.get("synced_at")
+            build_options.setdefault("sample_size", meta.get("sample_size"))
+            build_options.setdefault("features", parse_features(meta.get("features") or []))
+        with metrics.stage("refresh"):
+            # synced by someone else (e.g. ``python -m climate_pipeline ingest``) since the build
+            changed = event_store.synced_at() != built_from
+            synced = None
+            if not offline:
+                synced = sync_events(event_store)
+                changed = changed or (synced["ok"] and bool(synced["new"] or synced["updated"]))
+            if store.exists(path) and not (changed or force):
+                metrics.count("refresh.unchanged")
+                return {"built": False, "sync": synced}
+            summary = build_dataset(event_store, path, offline=offline, **build_options)
+            return dict(summary, built=True, sync=synced)
+    finally:
+        lock.release()
+
+
+class RefreshWorker:
+    """Refresh on a daemon thread when the dataset goes stale or on ``request()``.
+
+    The UI never waits on it; it polls ``running``, ``last_error`` and the
+    dataset version instead. A failed or skipped run is retried after
+    ``interval``, not in a loop.
+    """
+
+    def __init__(self, event_store, path=store.DEFAULT_PATH, interval=DEFAULT_INTERVAL, **options):
+        self.event_store = event_store
+        self.path = path
+        self.interval = interval
+        self.options = options
+        self._requested = None
+        self.running = False
+        self.last_finished = None
+        self.last_summary = None
+        self.last_error = None
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        threading.Thread(target=self._loop, name="refresh-dataset", daemon=True).start()
+
+    def request(self, **options):
+        """Refresh as soon as possible; ``options`` apply to that run only, not to scheduled ones."""
+        with self._lock:
+            self._requested = options
+        self._wake.set()
+
+    def due_in(self):
+        """Seconds until the next scheduled run; None while there is no dataset to refresh."""
+        if not store.exists(self.path):
+            return None
+        due = store.as_of(store.manifest(self.path)) + self.interval
+        if self.last_finished is not None:
+            due = max(due, self.last_finished + self.interval)
+        return max(0.0, due - time.time())
+
+    def _loop(self):
+        while True:
+            self._wake.wait(self.due_in())
+            self._wake.clear()
+            with self._lock:
+                options = dict(self.options, **(self._requested or {}))
+                self._requested = None
+            self.running = True
+            try:
+                summary = refresh(self.event_store, self.path, **options)
+                if summary is not None and summary["built"]:
+                    self.last_summary = summary
+                sync = summary["sync"] if summary is not None else None
+                self.last_error = RuntimeError("EONET sync failed") if sync and not sync["ok"] else None
+            except Exception as e:  # the worker outlives a bad run; the UI shows the error
+                self.last_error = e
+            finally:
+                self.running = False
+                self.last_finished = time.time()
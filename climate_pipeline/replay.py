@@ -0,0 +1,166 @@
+"""Record and replay NASA API responses through a compressed local archive.
+
+``CLIMATE_REPLAY=record`` saves every successful EONET/POWER response the
+pipeline receives; ``CLIMATE_REPLAY=replay`` answers requests from the
+archive alone and never opens a connection. Responses are keyed by URL
+path and sorted query string (not host), stored zlib-compressed in one
+SQLite file (``CLIMATE_ARCHIVE``, default ``data/replay.sqlite``), and
+the mock server can serve the same archive over HTTP.
+
+Both modes are requests transport adapters mounted by
+``fetch.make_session``, so every fetch path is covered without callers
+changing. A request that was never recorded replays as a 404, which the
+fetcher treats as a failed request.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from urllib.parse import parse_qsl, urlencode, urlparse
+
+import requests
+from requests.adapters import BaseAdapter, HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+
+MODE_ENV = "CLIMATE_REPLAY"
+ARCHIVE_ENV = "CLIMATE_ARCHIVE"
+DEFAULT_PATH = os.path.join("data", "replay.sqlite")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    url TEXT NOT NULL,
+    content_type TEXT,
+    body BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    recorded_at REAL NOT NULL
+);
+"""
+
+
+def replay_mode():
+    """``"record"``, ``"replay"`` or None, from ``CLIMATE_REPLAY``."""
+    mode = os.environ.get(MODE_ENV, "").lower()
+    return mode if mode in ("record", "replay") else None
+
+
+def request_key(url):
+    """Host-independent key: path plus sorted query parameters."""
+    parts = urlparse(url)
+    return parts.path + "?" + urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+
+
+class Archive:
+
+    def __init__(self, path=DEFAULT_PATH):
+        self.path = path
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(SCHEMA)
+
+    def close(self):
+        self._db.close()
+
+    def __len__(self):
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+    def get(self, key):
+        """``(content_type, body)`` recorded for ``key``, or None."""
+        with self._lock:
+            row = self._db.execute("SELECT content_type, body FROM responses WHERE key=?", (key,)).fetchone()
+        return (row[0], zlib.decompress(row[1])) if row else None
+
+    def put(self, url, content_type, body):
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?)",
+                (request_key(url), url, content_type, zlib.compress(body, 6), len(body), time.time())
+            )
+            self._db.commit()
+
+    def stats(self):
+        with self._lock:
+            count, raw, stored = self._db.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0), COALESCE(SUM(LENGTH(body)), 0) FROM responses"
+            ).fetchone()
+        return {"responses": count, "raw_bytes": raw, "stored_bytes": stored}
+
+
+_archives = {}
+_archives_lock = threading.Lock()
+
+
+def shared_archive(path=None):
+    """One open ``Archive`` per path for the whole process."""
+    path = path or os.environ.get(ARCHIVE_ENV) or DEFAULT_PATH
+    with _archives_lock:
+        if path not in _archives:
+            _archives[path] = Archive(path)
+        return _archives[path]
+
+
+# -----------------------------
+# Transport adapters
+# -----------------------------
+class RecordingAdapter(HTTPAdapter):
+    """Pass requests through and archive every 200 response.
+
+    Streamed bodies are read in full here, so recording trades the
+    streaming memory bound for a complete copy on disk.
+    """
+
+    def __init__(self, archive, **kwargs):
+        self.archive = archive
+        super().__init__(**kwargs)
+
+    def send(self, request, **kwargs):
+        response = super().send(request, **kwargs)
+        if response.status_code == 200:
+            self.archive.put(request.url, response.headers.get("Content-Type"), response.content)
+        return response
+
+
+class ReplayAdapter(BaseAdapter):
+    """Answer every request from the archive without touching the network."""
+
+    def __init__(self, archive):
+        self.archive = archive
+        super().__init__()
+
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        hit = self.archive.get(request_key(request.url))
+        response = requests.Response()
+        if hit:
+            response.status_code, response.reason = 200, "OK"
+            content_type, response._content = hit
+        else:
+            response.status_code, response.reason = 404, "Not Recorded"
+            content_type = "application/json"
+            response._content = json.dumps({"error": "not recorded", "key": request_key(request.url)}).encode()
+        response._content_consumed = True  # iter_content then yields from the body in memory
+        response.headers = CaseInsensitiveDict({
+            "Content-Type": content_type or "application/json", "Content-Length": str(len(response._content))
+        })
+        response.encoding = "utf-8"
+        response.url = request.url
+        response.request = request
+        return response
+
+    def close(self):
+        pass
+
+
+def session_adapter(pool_size):
+    """The adapter ``CLIMATE_REPLAY`` asks for, or None for plain HTTP."""
+    mode = replay_mode()
+    if mode == "record":
+        return RecordingAdapter(shared_archive(), pool_connections=pool_size, pool_maxsize=pool_size)
+    if mode == "replay":
+        return ReplayAdapter(shared_archive())
+    return None
@@ -0,0 +1,229 @@
+"""Batch "which disaster type fits these conditions" scoring.
+
+``Scorer`` wraps a trained model bundle (``models.train_models``) and
+returns per-category probabilities for whole batches at once, from raw
+climate vectors or from ``(lat, lon, date)`` locations whose climate is
+looked up through the POWER cache. ``serve`` exposes it over local HTTP::
+
+    python -m climate_pipeline.scoring --port 8766
+
+    POST /score  {"vectors": [[temp, humidity, wind, precip], ...]}
+    POST /score  {"locations": [{"lat": 38.5, "lon": -121.4, "date": "2024-07-01"}, ...]}
+    POST /score  {"locations": [...], "window_days": 7}   (at most MAX_WINDOW_DAYS)
+
+Large vector batches can skip JSON entirely: POST an ``.npy`` array with
+``Content-Type: application/x-npy`` (and ``?model=...``) and the response
+is the probability matrix as ``.npy``, columns in ``X-Categories`` order.
+"""
+import argparse
+import io
+import json
+import math
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+import pandas as pd
+
+from climate_pipeline.cache import ClimateCache, is_offline
+from climate_pipeline.enrich import DEFAULT_FEATURES, VARIABLES, enrich_events
+from climate_pipeline.models import CLASSIFIERS, DEFAULT_PATH as MODELS_PATH, latest_bundle
+
+DEFAULT_MODEL = "Naive Bayes"
+SCORE_PATH = "/score"
+NPY_TYPE = "application/x-npy"
+MAX_BATCH = 100_000
+MAX_WINDOW_DAYS = max(f.days for f in DEFAULT_FEATURES)  # 30; a longer lookback is never fetched
+
+
+def softmax(scores):
+    scores = scores - scores.max(axis=1, keepdims=True)
+    exp = np.exp(scores)
+    return exp / exp.sum(axis=1, keepdims=True)
+
+
+class Scorer:
+    """Vectorised scoring against one model bundle.
+
+    ``fetch_options`` go to ``power.fetch_power`` for location requests;
+    climate is read from ``cache`` first, so repeated places cost no I/O.
+    """
+
+    def __init__(self, bundle, cache=None, **fetch_options):
+        self.bundle = bundle
+        self.categories = [str(c) for c in bundle["classes"]]
+        self.cache = cache
+        self.fetch_options = fetch_options
+
+    @classmethod
+    def from_path(cls, path=MODELS_PATH, **options):
+        bundle = latest_bundle(path)
+        if bundle is None:
+            raise FileNotFoundError("no trained models in %s" % path)
+        return cls(bundle, **options)
+
+    def score_vectors(self, X, model=DEFAULT_MODEL):
+        """``(n, n_categories)`` probabilities; rows with a NaN feature get NaN."""
+        if model not in CLASSIFIERS:
+            raise ValueError("unknown model %r, expected one of %s" % (model, ", ".join(CLASSIFIERS)))
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim != 2 or X.shape[1] != len(VARIABLES):
+            raise ValueError("expected vectors of %d values (%s), got shape %s" % (
+                len(VARIABLES), ", ".join(VARIABLES), X.shape
+            ))
+        probs = np.full((len(X), len(self.categories)), np.nan)
+        valid = ~np.isnan(X).any(axis=1)
+        if not valid.any():
+            return probs
+        estimator = self.bundle["models"][model]
+        Xs = np.ascontiguousarray(self.bundle["scaler"].transform(X[valid]), dtype=np.float32)
+        if hasattr(estimator, "predict_proba"):
+            scores = estimator.predict_proba(Xs)
+        else:
+            # the hinge-loss SVM has no probabilities; softmax its margins instead
+            margins = estimator.decision_function(Xs)
+            scores = softmax(np.column_stack([-margins, margins]) if margins.ndim == 1 else margins)
+        columns = np.searchsorted(self.categories, [str(c) for c in estimator.classes_])
+        probs[np.ix_(valid, columns)] = scores
+        return probs
+
+    def climate(self, lat, lon, dates, window_days=0):
+        """``(n, n_variables)`` climate for each location, NaN where unavailable."""
+        events = pd.DataFrame({"latitude": lat, "longitude": lon, "date": pd.to_datetime(dates, utc=True)})
+        options = dict(self.fetch_options)
+        options.setdefault("offline", is_offline())
+        frame, _ = enrich_events(events, window_days, cache=self.cache, **options)
+        return frame[VARIABLES].to_numpy(np.float64)
+
+    def score(self, request):
+        """Answer one decoded ``/score`` request body with a JSON-ready dict."""
+        if not isinstance(request, dict):
+            raise ValueError("request body must be a JSON object")
+        model = request.get("model", DEFAULT_MODEL)
+        if "vectors" in request:
+            X = np.asarray(request["vectors"], dtype=np.float64)
+            climate = None
+        elif "locations" in request:
+            # checked before any climate lookup, so an oversized batch costs no POWER requests
+            if len(request["locations"]) > MAX_BATCH:
+                raise ValueError("batch of %d exceeds the limit of %d" % (len(request["locations"]), MAX_BATCH))
+            window_days = float(request.get("window_days", 0))
+            if not math.isfinite(window_days):
+                raise ValueError("window_days must be a finite number of days")
+            window_days = min(max(int(window_days), 0), MAX_WINDOW_DAYS)
+            locations = pd.DataFrame(request["locations"], columns=["lat", "lon", "date"])
+            X = climate = self.climate(
+                locations["lat"].to_numpy(float), locations["lon"].to_numpy(float),
+                locations["date"], window_days
+            )
+        else:
+            raise ValueError("request needs 'vectors' or 'locations'")
+        if len(X) > MAX_BATCH:
+            raise ValueError("batch of %d exceeds the limit of %d" % (len(X), MAX_BATCH))
+        probs = self.score_vectors(X, model)
+        missing = np.isnan(probs).any(axis=1)
+        predicted = np.asarray(self.categories, dtype=object)[np.nan_to_num(probs, nan=-1).argmax(axis=1)]
+        predicted[missing] = None
+        response = {
+            "model": model,
+            "bundle": self.bundle["key"],
+            "categories": self.categories,
+            "probabilities": _nullable(probs),
+            "predicted": predicted.tolist()
+        }
+        if climate is not None:
+            response["climate"] = _nullable(climate)
+        return response
+
+
+def _nullable(array):
+    """Nested lists with NaN as None, which ``json`` encodes as null."""
+    rows = np.round(array, 6).tolist()
+    for i in np.flatnonzero(np.isnan(array).any(axis=1)):
+        rows[i] = [None if v != v else v for v in rows[i]]
+    return rows
+
+
+# -----------------------------
+# HTTP service
+# -----------------------------
+class ScoringHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    scorer = None
+
+    def do_GET(self):
+        if self.path != "/health":
+            return self.send_json(404, {"error": "unknown path"})
+        self.send_json(200, {"bundle": self.scorer.bundle["key"], "categories": self.scorer.categories})
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        if url.path != SCORE_PATH:
+            return self.send_json(404, {"error": "unknown path"})
+        raw = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        try:
+            if self.headers.get("Content-Type") == NPY_TYPE:
+                model = parse_qs(url.query).get("model", [DEFAULT_MODEL])[0]
+                X = np.load(io.BytesIO(raw), allow_pickle=False)
+                if len(X) > MAX_BATCH:
+                    raise ValueError("batch of %d exceeds the limit of %d" % (len(X), MAX_BATCH))
+                return self.send_npy(self.scorer.score_vectors(X, model).astype(np.float32))
+            start = time.perf_counter()
+            response = self.scorer.score(json.loads(raw))
+            response["elapsed_ms"] = 1000 * (time.perf_counter() - start)
+        except (ValueError, TypeError, KeyError, OverflowError) as e:
+            return self.send_json(400, {"error": str(e)})
+        self.send_json(200, response)
+
+    def send_npy(self, array):
+        buffer = io.BytesIO()
+        np.save(buffer, array, allow_pickle=False)
+        payload = buffer.getvalue()
+        self.send_response(200)
+        self.send_header("Content-Type", NPY_TYPE)
+        self.send_header("Content-Length", str(len(payload)))
+        self.send_header("X-Categories", json.dumps(self.scorer.categories))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def send_json(self, status, body):
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+def serve(scorer, host="127.0.0.1", port=0):
+    """Start the scoring service on a daemon thread and return the server.
+
+    ``server.base_url`` holds the root URL, e.g. ``http://127.0.0.1:8766``.
+    """
+    handler = type("Handler", (ScoringHandler,), {"scorer": scorer})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    server.base_url = "http://%s:%d" % server.server_address[:2]
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--models", default=MODELS_PATH, help="directory of trained model bundles")
+    args = parser.parse_args()
+    server = serve(Scorer.from_path(args.models, cache=ClimateCache()), args.host, args.port)
+    print("Scoring service on", server.base_url + SCORE_PATH)
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -0,0 +1,129 @@
+"""Grid-bucketed spatial index over event coordinates.
+
+Points are sorted by a fixed lat/lon grid cell (a geohash-style bucket),
+with a CSR offset array giving each cell's slice. Because the cells of
+one grid row are consecutive, any lat/lon window is one contiguous slice
+per row. Radius, bounding-box and k-nearest queries gather those slices
+and run an exact haversine/box test on the candidates only.
+
+The index is saved as ``_spatial.npz`` inside the dataset directory when
+the dataset is written, so it always matches the data it indexes.
+"""
+import numpy as np
+
+from climate_pipeline.tracks import EARTH_RADIUS_KM, haversine_km
+
+FILENAME = "_spatial.npz"
+CELL_DEG = 0.5
+KM_PER_DEG = np.pi * EARTH_RADIUS_KM / 180
+
+
+class SpatialIndex:
+
+    def __init__(self, ids, lat, lon, cell_deg=CELL_DEG):
+        lat = np.asarray(lat, dtype=np.float64)
+        lon = np.asarray(lon, dtype=np.float64)
+        self.cell_deg = float(cell_deg)
+        self.rows = int(np.ceil(180 / self.cell_deg)) + 1
+        self.cols = int(np.ceil(360 / self.cell_deg)) + 1
+        cells = self._row(lat) * self.cols + self._col(lon)
+        order = np.argsort(cells, kind="stable")
+        self.ids = np.asarray(ids).astype(str)[order]
+        self.lat = lat[order]
+        self.lon = lon[order]
+        self.offsets = np.searchsorted(cells[order], np.arange(self.rows * self.cols + 1))
+
+    def __len__(self):
+        return len(self.ids)
+
+    def _row(self, lat):
+        return np.clip(np.floor((np.asarray(lat) + 90) / self.cell_deg), 0, self.rows - 1).astype(np.int64)
+
+    def _col(self, lon):
+        return np.clip(np.floor((np.asarray(lon) + 180) / self.cell_deg), 0, self.cols - 1).astype(np.int64)
+
+    # -----------------------------
+    # Persistence
+    # -----------------------------
+    def save(self, path):
+        with open(path, "wb") as f:
+            np.savez(f, ids=self.ids, lat=self.lat, lon=self.lon, offsets=self.offsets,
+                     cell_deg=self.cell_deg)
+
+    @classmethod
+    def load(cls, path):
+        index = cls.__new__(cls)
+        with np.load(path) as data:
+            index.cell_deg = float(data["cell_deg"])
+            for name in ("ids", "lat", "lon", "offsets"):
+                setattr(index, name, data[name])
+        index.rows = int(np.ceil(180 / index.cell_deg)) + 1
+        index.cols = int(np.ceil(360 / index.cell_deg)) + 1
+        return index
+
+    # -----------------------------
+    # Queries
+    # -----------------------------
+    def _window(self, south, north, west, east):
+        """Positions of every point in cells overlapping the window.
+
+        ``west > east`` means the window crosses the antimeridian.
+        """
+        first, last = int(self._row(south)), int(self._row(north))
+        if west <= -180.0 and east >= 180.0:
+            return np.arange(self.offsets[first * self.cols], self.offsets[(last + 1) * self.cols])
+        spans = [(west, east)] if west <= east else [(west, 180.0), (-180.0, east)]
+        parts = []
+        for r in range(first, last + 1):
+            for w, e in spans:
+                lo = self.offsets[r * self.cols + self._col(w)]
+                hi = self.offsets[r * self.cols + self._col(e) + 1]
+                if hi > lo:
+                    parts.append(np.arange(lo, hi))
+        return np.concatenate(parts) if parts else np.empty(0, dtype=np.int64)
+
+    def bbox(self, south, west, north, east):
+        """Ids inside the box; ``west > east`` wraps across the antimeridian."""
+        pos = self._window(south, north, west, east)
+        lat, lon = self.lat[pos], self.lon[pos]
+        inside_lon = (lon >= west) & (lon <= east) if west <= east else (lon >= west) | (lon <= east)
+        return self.ids[pos[(lat >= south) & (lat <= north) & inside_lon]]
+
+    def _near(self, lat, lon, km):
+        dlat = km / KM_PER_DEG
+        south, north = max(-90.0, lat - dlat), min(90.0, lat + dlat)
+        widest = max(abs(south), abs(north))
+        if widest >= 89.0 or km >= EARTH_RADIUS_KM:
+            west, east = -180.0, 180.0
+        else:
+            dlon = min(180.0, dlat / np.cos(np.radians(widest)))
+            west, east = (lon - dlon + 180) % 360 - 180, (lon + dlon + 180) % 360 - 180
+            if dlon >= 180.0:
+                west, east = -180.0, 180.0
+        pos = self._window(south, north, west, east)
+        dist = haversine_km(lat, lon, self.lat[pos], self.lon[pos])
+        keep = dist <= km
+        return pos[keep], dist[keep]
+
+    def radius(self, lat, lon, km):
+        """Ids within ``km`` of the point, nearest first, with their distances."""
+        pos, dist = self._near(lat, lon, km)
+        order = np.argsort(dist, kind="stable")
+        return self.ids[pos[order]], dist[order]
+
+    def nearest(self, lat, lon, k=10):
+        """The ``k`` nearest ids and their distances.
+
+        The search radius doubles until it holds ``k`` points; every point
+        closer than the k-th is then guaranteed to be inside it.
+        """
+        k = min(int(k), len(self))
+        # start near the radius expected to hold k points at the average density
+        km = max(self.cell_deg * KM_PER_DEG, 2 * EARTH_RADIUS_KM * np.sqrt(k / max(len(self), 1)))
+        while True:
+            pos, dist = self._near(lat, lon, km)
+            if len(pos) >= k or km >= np.pi * EARTH_RADIUS_KM:
+                break
+            km *= 2
+        order = np.argsort(dist, kind="stable")[:k]
+        return self.ids[pos[order]], dist[order]
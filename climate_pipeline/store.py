@@ -0,0 +1,192 @@
+"""Columnar Parquet store for the combined event + climate table.
+
+The dataset is hive-partitioned by year/month/category, so readers only
+touch the files (and columns) a view needs::
+
+    frame = read_dataset(columns=["category", "temp"], categories=["Wildfires"])
+
+A small ``_manifest.json`` next to the partitions records the version
+the dashboard uses as its cache key, and ``_spatial.npz`` holds the
+spatial index over the event coordinates.
+
+Each commit is a new directory under ``versions/``, and the one-line
+``CURRENT`` file names the live one. Swapping a version in is a single
+atomic file replace, and the last few versions are kept, so a reader
+that resolved ``CURRENT`` before a swap can finish its scan.
+"""
+import json
+import os
+import shutil
+import time
+from datetime import datetime
+from urllib.parse import unquote
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+
+from climate_pipeline import metrics
+from climate_pipeline.spatial import FILENAME as SPATIAL_INDEX, SpatialIndex
+
+DEFAULT_PATH = os.path.join("data", "dataset")
+PARTITIONS = ["year", "month", "category"]
+MANIFEST = "_manifest.json"
+CURRENT = "CURRENT"
+VERSIONS = "versions"
+KEEP_VERSIONS = 3
+
+
+def current(path=DEFAULT_PATH):
+    """Directory of the live version; a dataset written before versioning is ``path`` itself."""
+    try:
+        with open(os.path.join(path, CURRENT)) as f:
+            return os.path.join(path, VERSIONS, f.read().strip())
+    except FileNotFoundError:
+        return path
+
+
+def exists(path=DEFAULT_PATH):
+    return os.path.exists(os.path.join(current(path), MANIFEST))
+
+
+def manifest(path=DEFAULT_PATH):
+    with open(os.path.join(current(path), MANIFEST)) as f:
+        return json.load(f)
+
+
+def as_of(meta):
+    """Epoch seconds the manifest's events were synced from NASA (its build time if unknown)."""
+    if meta.get("synced_at"):
+        return datetime.fromisoformat(meta["synced_at"]).timestamp()
+    return meta["version"] / 1e9
+
+
+def _table(frame):
+    frame = frame.drop(columns=["digest"], errors="ignore").copy()
+    frame["date"] = pd.to_datetime(frame["date"], utc=True)
+    frame["year"] = frame["date"].dt.year.astype("int32")
+    frame["month"] = frame["date"].dt.month.astype("int32")
+    frame["category"] = frame["category"].astype(str)
+    return pa.Table.from_pandas(frame, preserve_index=False)
+
+
+class DatasetWriter:
+    """Write the dataset one batch at a time and swap it in when done.
+
+    Batches go to ``<path>.tmp`` as numbered part files, so memory is
+    bounded by one batch. With ``resume=True`` parts already in the
+    staging directory are kept; rewriting a part number replaces its files.
+    """
+
+    def __init__(self, path=DEFAULT_PATH, resume=False):
+        self.path = path
+        self.staging = path + ".tmp"
+        self.rows = 0
+        if not resume:
+            shutil.rmtree(self.staging, ignore_errors=True)
+
+    def write(self, frame, part):
+        if frame.empty:
+            return
+        ds.write_dataset(
+            _table(frame), self.staging, format="parquet",
+            partitioning=PARTITIONS, partitioning_flavor="hive",
+            basename_template="part-%06d-{i}.parquet" % part,
+            existing_data_behavior="overwrite_or_ignore"
+        )
+        self.rows += len(frame)
+
+    def discard(self):
+        shutil.rmtree(self.staging, ignore_errors=True)
+
+    def commit(self, **info):
+        """Write the spatial index and manifest, then atomically make this the live version.
+
+        Readers keep whichever version they resolved until they next call
+        ``current``; versions beyond ``KEEP_VERSIONS`` are removed.
+        """
+        frame = open_dataset(self.staging)
+        points = frame.to_table(columns=["id", "latitude", "longitude"])
+        SpatialIndex(
+            points["id"].to_numpy(zero_copy_only=False),
+            points["latitude"].to_numpy(), points["longitude"].to_numpy()
+        ).save(os.path.join(self.staging, SPATIAL_INDEX))
+        meta = {"version": time.time_ns(), "rows": frame.count_rows(), "columns": frame.schema.names}
+        meta.update(info)
+        with open(os.path.join(self.staging, MANIFEST), "w") as f:
+            json.dump(meta, f)
+
+        legacy = os.path.exists(os.path.join(self.path, MANIFEST))
+        versions = os.path.join(self.path, VERSIONS)
+        os.makedirs(versions, exist_ok=True)
+        os.rename(self.staging, os.path.join(versions, str(meta["version"])))
+        pointer = os.path.join(self.path, CURRENT)
+        with open(pointer + ".tmp", "w") as f:
+            f.write(str(meta["version"]))
+        os.replace(pointer + ".tmp", pointer)
+
+        if legacy:  # partitions written before versioning sat directly under path
+            for name in os.listdir(self.path):
+                if name not in (VERSIONS, CURRENT):
+                    target = os.path.join(self.path, name)
+                    if os.path.isdir(target):
+                        shutil.rmtree(target)
+                    else:
+                        os.remove(target)
+        for old in sorted((v for v in os.listdir(versions) if v.isdigit()), key=int)[:-KEEP_VERSIONS]:
+            shutil.rmtree(os.path.join(versions, old), ignore_errors=True)
+        return meta
+
+
+def write_dataset(frame, path=DEFAULT_PATH, **info):
+    """Replace the dataset at ``path`` with ``frame``."""
+    writer = DatasetWriter(path)
+    writer.write(frame, 0)
+    return writer.commit(**info)
+
+
+def spatial_index(path=DEFAULT_PATH):
+    """The dataset's ``SpatialIndex``, built when it was written."""
+    return SpatialIndex.load(os.path.join(current(path), SPATIAL_INDEX))
+
+
+def open_dataset(path=DEFAULT_PATH):
+    """Lazy handle on the dataset; nothing is read until it is scanned."""
+    return ds.dataset(current(path), format="parquet", partitioning="hive")
+
+
+def categories(path=DEFAULT_PATH):
+    """Category values from the partition directories, without opening any file."""
+    found = set()
+    for _, dirs, _ in os.walk(current(path)):
+        found.update(unquote(d.split("=", 1)[1]) for d in dirs if d.startswith("category="))
+    return sorted(found)
+
+
+def build_filter(categories=None, start=None, end=None):
+    """Predicate pushed down to the scan; partition keys prune whole files."""
+    expr = None
+    if categories:
+        expr = ds.field("category").isin(list(categories))
+    if start is not None:
+        cond = ds.field("date") >= pd.Timestamp(start, tz="UTC")
+        expr = cond if expr is None else expr & cond
+    if end is not None:
+        cond = ds.field("date") <= pd.Timestamp(end, tz="UTC")
+        expr = cond if expr is None else expr & cond
+    return expr
+
+
+def read_dataset(path=DEFAULT_PATH, columns=None, categories=None, start=None, end=None, ids=None):
+    """Read only ``columns`` of the rows matching the filters."""
+    expr = build_filter(categories, start, end)
+    if ids is not None:
+        cond = ds.field("id").isin(list(ids))
+        expr = cond if expr is None else expr & cond
+    with metrics.stage("dataset.read"):
+        table = open_dataset(path).to_table(columns=columns, filter=expr)
+        frame = table.to_pandas()
+        if "category" in frame:
+            frame["category"] = frame["category"].astype("category")
+    metrics.count("dataset.rows", len(frame))
+    return frame
@@ -1,66 +1,75 @@
+import time
+
 import streamlit as st
-import pandas as pd
-import numpy as np
-import requests
-import seaborn as sns
-import matplotlib.pyplot as plt
-import plotly.express as px
+
+from climate_pipeline import metrics
+from climate_pipeline.cache import ClimateCache, is_offline
 
 st.set_page_config(page_title="NASA Disaster & Climate ML Project", layout="wide")
+metrics.reset()
+
+# pages that read the dataset, and the columns each one reads; the others never
+# import pandas, plotly or the pipeline, and never wait on a NASA fetch
+PAGE_COLUMNS = {
+    "Data Prep / EDA": (),
+    "Visualizations": ("id", "category", "latitude", "longitude"),
+}
 
 # -----------------------------
 # Helper Functions (API)
 # -----------------------------
-@st.cache_data
-def load_eonet_data():
-    url = "https://eonet.gsfc.nasa.gov/api/v3/events"
-    params = {"limit": 200}
-    response = requests.get(url, params=params)
-    data = response.json()["events"]
-
-    rows = []
-    for e in data:
-        if e["geometry"]:
-            geo = e["geometry"][-1]
-            rows.append({
-                "id": e["id"],
-                "title": e["title"],
-                "category": e["categories"][0]["title"],
-                "date": geo["date"],
-                "longitude": geo["coordinates"][0],
-                "latitude": geo["coordinates"][1]
-            })
-    return pd.DataFrame(rows)
+@st.cache_resource
+def climate_cache():
+    return ClimateCache()
+
+
+@st.cache_resource
+def event_store():
+    from climate_pipeline.eonet import EventStore
+    return EventStore()
+
+
+@st.cache_resource
+def aggregate_store():
+    from climate_pipeline.aggregates import AggregateStore
+    return AggregateStore()
+
+
+@st.cache_resource
+def load_aggregates(version):
+    # histograms, quantiles, monthly counts and correlations, materialised per dataset version
+    with metrics.stage("aggregates.load"):
+        return aggregate_store().load()
+
+
+@st.cache_resource
+def refresh_worker():
+    from climate_pipeline.refresh import RefreshWorker
+    # one per server process; the lock file keeps other processes from refreshing at the same time
+    return RefreshWorker(event_store(), cache=climate_cache())
+
+
+@st.fragment(run_every=5)
+def watch_refresh(worker, version):
+    from climate_pipeline import store
+    # only this fragment polls; the page reruns once the worker has swapped in a new version
+    if store.manifest()["version"] != version:
+        st.rerun()
+    if worker.running:
+        st.caption("Refreshing from NASA in the background...")
+    elif worker.last_error is not None:
+        st.caption(f"Last refresh failed: {worker.last_error}")
+    elif worker.last_summary is not None and not worker.last_summary["rows"]:
+        st.caption("The last refresh enriched no events; showing the previous dataset.")
 
 
 @st.cache_data
-def load_power_data(df):
-    climate_rows = []
-
-    for _, row in df.iterrows():
-        date = row["date"][:10].replace("-", "")
-        url = "https://power.larc.nasa.gov/api/temporal/daily/point"
-        params = {
-            "latitude": row["latitude"],
-            "longitude": row["longitude"],
-            "start": date,
-            "end": date,
-            "parameters": "T2M,RH2M,WS2M,PRECTOT",
-            "format": "JSON"
-        }
-
-        r = requests.get(url, params=params)
-        if r.status_code == 200:
-            js = r.json()["properties"]["parameter"]
-            climate_rows.append({
-                **row.to_dict(),
-                "temp": list(js.get("T2M", {}).values())[0],
-                "humidity": list(js.get("RH2M", {}).values())[0],
-                "wind": list(js.get("WS2M", {}).values())[0],
-                "precip": list(js.get("PRECTOT", {}).values())[0]
-            })
-
-    return pd.DataFrame(climate_rows)
+def load_tracks(ids, offline=False):
+    from climate_pipeline.tracks import enrich_track, track_aggregates, track_table
+    # every geometry point, enriched in one batched pass over (cell, day) pairs
+    track = track_table(event_store().events(ids))
+    track, report = enrich_track(track, cache=climate_cache(), offline=offline)
+    return track_aggregates(track), report
 
 # -----------------------------
 # Load Data
@@ -71,15 +80,148 @@ page = st.sidebar.radio(
     ["Introduction", "Data Prep / EDA", "Visualizations", "Models (Coming Soon)", "Conclusions"]
 )
 
+offline = st.sidebar.checkbox("Offline mode (cached data only)", value=is_offline())
+if not offline:
+    from climate_pipeline.fetch import api_source  # imports requests; only needed for this caption
+    st.sidebar.caption(f"NASA data source: {api_source()}")
+use_tracks = st.sidebar.checkbox("Use full event tracks", value=False)
+
+
+def build_combined(offline=False, sample_size=None):
+    from climate_pipeline.refresh import refresh
+    # only when there is no dataset to serve yet; a visitor arriving while another
+    # request or process builds it waits on the refresh lock instead of fetching again
+    bar = st.sidebar.progress(0.0, text="Enriching events")
+
+    def progress(done, total):
+        bar.progress(done / total if total else 1.0, text=f"Enriching events: {done:,} / {total:,}")
+
+    summary = refresh(
+        event_store(), offline=offline, wait=True, missing_only=True,
+        sample_size=sample_size, progress=progress, cache=climate_cache()
+    )
+    bar.empty()
+    return summary
+
+
+@st.cache_data
+def load_view(columns, categories, version):
+    from climate_pipeline import store
+    # column projection + category pushdown: a page reads only what it draws
+    return store.read_dataset(columns=list(columns) if columns else None, categories=list(categories))
+
+
+@st.cache_resource
+def load_spatial_index(version):
+    from climate_pipeline import store
+    return store.spatial_index()
+
+
+def query_region(region, version):
+    # answered from the persisted grid index, not by scanning every row
+    index = load_spatial_index(version)
+    mode, args = region
+    if mode == "Bounding box":
+        return index.bbox(*args)
+    if mode == "Within a radius":
+        return index.radius(*args)[0]
+    return index.nearest(*args)[0]
+
+
+@st.cache_resource(max_entries=16)
+def load_region_aggregates(categories, region, version):
+    from climate_pipeline.aggregates import from_frame
+    from climate_pipeline.enrich import VARIABLES
+    frame = load_view(("id", "date", "category", *VARIABLES), categories, version)
+    return from_frame(frame[frame["id"].isin(query_region(region, version))])
+
+
 @st.cache_data
-def load_combined():
-    eonet = load_eonet_data()
-    combined = load_power_data(eonet.sample(50, random_state=42))
-    combined["date"] = pd.to_datetime(combined["date"])
-    combined.dropna(inplace=True)
-    return combined
+def load_hex_bins(categories, zoom, version):
+    from climate_pipeline.geobin import bin_points
+    # the browser gets one marker per occupied hex instead of one per event
+    frame = load_view(("category", "latitude", "longitude"), categories, version)
+    with metrics.stage("geobin"):
+        return bin_points(frame, zoom)
+
+
+if page in PAGE_COLUMNS:
+    from climate_pipeline import charts, store
+
+    # the dataset is shared by every session, so its size only changes on an explicit
+    # rebuild; the widgets start from what the live dataset was built with
+    built = store.manifest().get("sample_size", 50) if store.exists() else 50
+    full_mode = st.sidebar.checkbox("Full dataset (every event)", value=built is None)
+    sample_size = None if full_mode else int(
+        st.sidebar.number_input("Sample size", min_value=10, value=built or 50, step=50)
+    )
+    refresh = st.sidebar.button("Refresh from NASA", help="Sync and rebuild with the sample size above")
+
+    # the dashboard serves the local Parquet dataset; NASA is only hit to build or refresh it
+    worker = refresh_worker()
+    if not store.exists():
+        summary = build_combined(offline, sample_size)
+        if summary is not None:
+            st.session_state["request_report"] = summary["report"]
+        if not store.exists():
+            st.warning("No cached data yet. Run the app once with network access to fill the cache.")
+            st.stop()
+    elif refresh:
+        # stale-while-revalidate: this version stays on screen while the worker builds the next;
+        # enrichment already stored per event is reused
+        worker.request(sample_size=sample_size, offline=offline, force=True)
+
+    manifest = store.manifest()
+    aggregates = load_aggregates(manifest["version"])
+    selected = st.sidebar.multiselect("Categories", store.categories())
+
+    region_mode = st.sidebar.selectbox("Region", ["Everywhere", "Within a radius", "Bounding box", "Nearest events"])
+    region = None
+    if region_mode == "Bounding box":
+        south, north = st.sidebar.slider("Latitude range", -90.0, 90.0, (24.0, 50.0))
+        west, east = st.sidebar.slider("Longitude range", -180.0, 180.0, (-125.0, -66.0))
+        region = (region_mode, (south, west, north, east))
+    elif region_mode != "Everywhere":
+        lat = st.sidebar.number_input("Latitude", -90.0, 90.0, 37.77)
+        lon = st.sidebar.number_input("Longitude", -180.0, 180.0, -122.42)
+        if region_mode == "Within a radius":
+            region = (region_mode, (lat, lon, st.sidebar.number_input("Radius (km)", 1.0, 20000.0, 500.0, step=50.0)))
+        else:
+            region = (region_mode, (lat, lon, int(st.sidebar.number_input("Events", 1, 10000, 25))))
+    if region is not None:
+        started = time.perf_counter()
+        region_ids = query_region(region, manifest["version"])
+        st.sidebar.caption(
+            f"{len(region_ids):,} events in region ({(time.perf_counter() - started) * 1000:.2f} ms)"
+        )
+        aggregates = load_region_aggregates(tuple(selected), region, manifest["version"])
+
+    stats = climate_cache().stats()
+    st.sidebar.caption(
+        f"Data as of {time.strftime('%Y-%m-%d %H:%M %Z', time.localtime(store.as_of(manifest)))}"
+    )
+    with st.sidebar:
+        watch_refresh(worker, manifest["version"])
+    st.sidebar.caption(
+        f"Dataset: {manifest['rows']:,} events "
+        f"({'full' if manifest.get('sample_size') is None else 'sample of %d' % manifest['sample_size']})"
+    )
+    st.sidebar.caption(
+        f"Climate cache: {stats['hits']} hits, {stats['misses']} misses, {stats['entries']} entries"
+    )
+    request_report = worker.last_summary["report"] if worker.last_summary else st.session_state.get("request_report")
+    if request_report:
+        st.sidebar.caption(
+            f"POWER requests: {request_report['planned_requests']} planned "
+            f"vs {request_report['naive_requests']} one-per-event"
+        )
 
-df = load_combined()
+    df = load_view(PAGE_COLUMNS[page], tuple(selected), manifest["version"])
+    if region is not None:
+        df = df[df["id"].isin(region_ids)]
+    if df.empty:
+        st.info("No events match the selected categories and region.")
+        st.stop()
 
 # -----------------------------
 # INTRODUCTION TAB
@@ -137,9 +279,18 @@ elif page == "Data Prep / EDA":
     st.write(df.isna().sum())
 
     st.subheader("Event Category Distribution")
-    fig = px.bar(df, x="category", title="Disaster Categories")
+    fig = charts.category_counts(aggregates, selected, title="Disaster Categories")
     st.plotly_chart(fig, use_container_width=True)
 
+    if use_tracks:
+        st.subheader("Event Tracks")
+        tracks, track_report = load_tracks(tuple(df["id"]), offline)
+        st.caption(
+            f"{tracks['points'].sum()} track points, "
+            f"{track_report['planned_requests']} POWER requests planned"
+        )
+        st.dataframe(tracks)
+
 # -----------------------------
 # VISUALIZATIONS TAB
 # -----------------------------
@@ -150,35 +301,38 @@ elif page == "Visualizations":
 
     with col1:
         st.subheader("Temperature Distribution")
-        fig, ax = plt.subplots()
-        sns.histplot(df["temp"], bins=20, ax=ax)
-        ax.set_title("Temperature Distribution")
-        st.pyplot(fig)
+        fig = charts.histogram(aggregates, "temp", bins=20, categories=selected, title="Temperature Distribution")
+        st.plotly_chart(fig, use_container_width=True)
 
     with col2:
         st.subheader("Wind Speed vs Temperature")
-        fig = px.scatter(
-            df,
-            x="temp",
-            y="wind",
-            color="category",
-            title="Wind Speed vs Temperature by Disaster Type"
-        )
+        fig = charts.binned_scatter(aggregates, selected, title="Wind Speed vs Temperature (event density)")
         st.plotly_chart(fig, use_container_width=True)
 
     st.subheader("Correlation Heatmap")
-    fig, ax = plt.subplots()
-    sns.heatmap(df[["temp", "humidity", "wind", "precip"]].corr(), annot=True, ax=ax)
-    st.pyplot(fig)
+    fig = charts.correlation(aggregates, selected)
+    st.plotly_chart(fig, use_container_width=True)
 
     st.subheader("Geographic Distribution of Events")
-    fig = px.scatter_geo(
-        df,
-        lat="latitude",
-        lon="longitude",
-        color="category",
-        title="Global Disaster Locations"
-    )
+    from climate_pipeline.geobin import MAX_ZOOM, RAW_POINT_LIMIT, bin_points
+    map_mode = st.radio("Map", ["Auto", "Points", "Hex bins"], horizontal=True)
+    if map_mode == "Hex bins" or (map_mode == "Auto" and len(df) > RAW_POINT_LIMIT):
+        zoom = st.slider("Map detail (zoom level)", 0, MAX_ZOOM, 2)
+        if region is None:
+            cells = load_hex_bins(tuple(selected), zoom, manifest["version"])
+        else:
+            cells = bin_points(df, zoom)
+        st.caption(f"{len(df):,} events in {len(cells):,} hexes")
+        fig = charts.hex_map(cells, title="Global Disaster Locations")
+    else:
+        import plotly.express as px
+        fig = px.scatter_geo(
+            df,
+            lat="latitude",
+            lon="longitude",
+            color="category",
+            title="Global Disaster Locations"
+        )
     st.plotly_chart(fig, use_container_width=True)
 
 # -----------------------------
@@ -221,3 +375,7 @@ elif page == "Conclusions":
     monitoring, and data-driven decision-making for climate resilience.
     """)
 
+# -----------------------------
+# PERFORMANCE (hidden; open the app with ?perf=1)
+# -----------------------------
+metrics.show_panel()
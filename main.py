@@ -1,5 +1,10 @@
+import os
+import time
+
 import streamlit as st
 
+from climate_pipeline import metrics
+
 # --------------------------------------------------
 # PAGE CONFIG
 # --------------------------------------------------
@@ -8,6 +13,64 @@ st.set_page_config(
     page_icon="🌍",
     layout="wide"
 )
+metrics.reset()
+
+# --------------------------------------------------
+# DATA
+# --------------------------------------------------
+# every tab renders on each run, so the heavy imports (pandas, pyarrow, plotly,
+# scikit-learn) happen inside the tabs that use them, after the first ones have painted
+@st.cache_resource
+def aggregate_store():
+    from climate_pipeline.aggregates import AggregateStore
+    return AggregateStore()
+
+
+@st.cache_resource
+def load_aggregates(version):
+    # materialised once per dataset version; unchanged partitions are reused
+    with metrics.stage("aggregates.load"):
+        return aggregate_store().load()
+
+
+@st.cache_resource
+def training_worker():
+    from climate_pipeline.models import TrainingWorker
+    return TrainingWorker()
+
+
+def load_model_frame():
+    from climate_pipeline import store
+    from climate_pipeline.enrich import VARIABLES
+    return store.read_dataset(columns=["id", "category", *VARIABLES])
+
+
+def show_models(bundle):
+    import pandas as pd
+    from climate_pipeline.enrich import VARIABLES
+    from climate_pipeline.models import HOLDOUT_BUCKETS
+    report = pd.DataFrame(bundle["report"]).rename(columns={
+        "model": "Model", "mode": "Fit", "rows": "Rows fitted", "fit_s": "Fit time (s)",
+        "rows_per_s": "Inference (rows/s)", "metric": "Metric", "score": "Score"
+    })
+    st.dataframe(
+        report.style.format({"Fit time (s)": "{:.3f}", "Inference (rows/s)": "{:,.0f}", "Score": "{:.3f}"}),
+        hide_index=True, use_container_width=True
+    )
+    st.caption(
+        f"Model bundle {bundle['key']}: {len(bundle['ids']):,} events, "
+        f"one in {HOLDOUT_BUCKETS} held out for scoring."
+    )
+    tree = bundle["models"]["Decision Tree"]
+    st.bar_chart(pd.Series(tree.feature_importances_, index=VARIABLES, name="Decision tree feature importance"))
+
+
+@st.fragment(run_every=2)
+def poll_training(job):
+    # only this fragment reruns while the worker trains; the rest of the page stays put
+    if job.done():
+        st.rerun()
+    st.info("Training models in the background...")
 
 # --------------------------------------------------
 # TITLE
@@ -174,6 +237,8 @@ with tab2:
 # EDA & VISUALIZATIONS
 # --------------------------------------------------
 with tab3:
+    from climate_pipeline import charts, store
+
     st.header("📊 Exploratory Data Analysis")
 
     st.write("""
@@ -182,69 +247,92 @@ with tab3:
     with different disaster categories.
     """)
 
-    def viz_block(image, title, description):
+    # charts are drawn live from the materialised aggregates of the local dataset;
+    # the saved images are only shown until that dataset has been built
+    aggregates = load_aggregates(store.manifest()["version"]) if store.exists() else None
+    if aggregates is None:
+        st.caption("No local dataset yet - showing saved charts. Build it from the dashboard app.")
+    else:
+        as_of = time.strftime("%Y-%m-%d %H:%M %Z", time.localtime(store.as_of(store.manifest())))
+        st.caption(f"Computed from {aggregates.rows():,} events. Data as of {as_of}.")
+
+    def viz_block(chart, image, title, description):
         with st.container():
             col1, col2 = st.columns([1.3, 2])
             with col1:
-                st.image(image, use_container_width=True)
+                if aggregates is None:
+                    st.image(image, use_container_width=True)
+                else:
+                    with metrics.stage("charts.render"):
+                        st.plotly_chart(chart(aggregates), use_container_width=True)
             with col2:
                 st.subheader(title)
                 st.write(description)
         st.markdown("---")
 
     viz_block(
+        lambda a: charts.histogram(a, "temp"),
         "images/temp_dist.png",
         "Temperature Distribution Across Disaster Events",
         "This plot shows how temperature values are distributed for all recorded disaster events. Most disasters occur within a moderate to high temperature range, with a noticeable concentration around warmer values. This suggests that many recorded events especially wildfires tend to happen under elevated temperature conditions. A small number of low temperature events are also present, likely associated with ice related events"
     )
 
     viz_block(
+        charts.binned_scatter,
         "images/wind_speed.png",
         "Relationship Between Wind Speed and Temperature",
         "This scatter plot explores how wind speed varies with temperature across different disaster categories. While there is no strong linear relationship, higher wind speeds tend to appear more frequently at moderate to high temperatures. This pattern is particularly important for disasters like wildfires and storms, where wind can significantly influence spread and severity."
     )
 
     viz_block(
+        lambda a: charts.violin(a, "temp"),
         "images/voilin.png",
         "Temperature Variation by Disaster Category",
         "This violin plot compares temperature distributions across disaster types. Wildfires generally occur across a wide range of temperatures, often skewed toward higher values. Volcanic events show a narrower temperature range, while sea and lake ice events are concentrated at very low temperatures. This visualization highlights how different disasters are associated with distinct temperature conditions."
     )
 
     viz_block(
+        charts.correlation,
         "images/correlation.png",
         "Correlation Between Climate Variables",
         "The correlation heatmap shows relationships among temperature, humidity, wind speed, and precipitation. Temperature and humidity exhibit a moderate negative correlation, meaning higher temperatures often coincide with lower humidity. Precipitation shows weak correlations with other variables, suggesting it behaves more independently. These relationships help explain how certain combinations of climate factors contribute to different disaster types."
     )
     viz_block(
+        lambda a: charts.histogram(a, "precip"),
         "images/precip.png",
         "Precipitation Distribution Across Disaster Events",
         "This histogram displays the distribution of precipitation values across all disaster events. Most events occur under low precipitation conditions, with a long tail representing heavy rainfall events. This indicates that while extreme precipitation is less common, it plays a critical role in certain disasters such as floods and severe storms."
     )
 
     viz_block(
+        lambda a: charts.box(a, "humidity"),
         "images/humi.png",
         "Humidity Levels by Disaster Type",
         "This box plot compares humidity levels across disaster categories. Wildfires tend to occur under lower humidity conditions, which aligns with known fire behavior. In contrast, volcanic and ice-related events show higher humidity levels. The variation within each category highlights how humidity influences disaster likelihood differently depending on event types."
     )
 
     viz_block(
+        charts.category_counts,
         "images/dist_disaster.png",
         "Distribution of Disaster Categories",
         "This bar chart shows the frequency of different disaster types in the dataset. Wildfires dominate the dataset, while volcanic and ice-related events appear far less frequently. This imbalance reflects both the global prevalence of wildfires and the reporting focus of the data sources."
     )
 
     viz_block(
+        lambda a: charts.box(a, "precip"),
         "images/boxplot.png",
         "Precipitation by Disaster Type",
         "This box plot illustrates how precipitation levels differ across disaster categories. Wildfires are associated with minimal precipitation, while other disaster types show wider variability. This reinforces the idea that low precipitation is a key condition for fire related disasters, whereas storms and floods require heavier rainfall."
     )
     viz_block(
+        charts.monthly_counts,
         "images/disaster_month.png",
         "Seasonal Distribution of Disasters",
         "This histogram shows how disaster events are distributed throughout the year. There is a clear increase in events during certain months, indicating seasonal patterns. Peaks during warmer months align with wildfire activity, while other events occur more evenly or during specific seasons."
     )
 
     viz_block(
+        lambda a: charts.histogram(a, "wind"),
         "images/wind.png",
         "Wind Speed Distribution",
         "This plot shows the distribution of wind speed values across all disaster events. Most events occur at low to moderate wind speeds, with fewer cases of extreme wind. However, even moderate winds can significantly impact disasters like wildfires and storms, making wind speed an important contributing factor."
@@ -254,26 +342,55 @@ with tab3:
 # MODELS
 # --------------------------------------------------
 with tab4:
-    st.header("🤖 Machine Learning Models (Upcomimg)")
-    if False:
-        st.info("""
-        The prepared dataset allows for the application of several
-        machine learning techniques to identify patterns and make predictions.
-        """)
+    import pandas as pd
+    from climate_pipeline import store
+    from climate_pipeline.models import LEADERBOARD
 
-        st.subheader("Models Considered")
-        st.write("""
-        - **K-Means Clustering:** Group disasters based on climate similarity  
-        - **Principal Component Analysis (PCA):** Reduce dimensionality  
-        - **Decision Trees:** Identify important climate thresholds  
-        - **Naive Bayes:** Probabilistic classification of disaster types  
-        - **Support Vector Machines (SVM):** Disaster category classification  
-        """)
+    st.header("🤖 Machine Learning Models")
+    st.info("""
+    The prepared dataset allows for the application of several
+    machine learning techniques to identify patterns and make predictions.
+    """)
 
-        st.info("""
-        These models help explore whether climate conditions
-        can meaningfully distinguish between different disaster categories.
-        """)
+    st.subheader("Models Considered")
+    st.write("""
+    - **K-Means Clustering:** Group disasters based on climate similarity  
+    - **Principal Component Analysis (PCA):** Reduce dimensionality  
+    - **Decision Trees:** Identify important climate thresholds  
+    - **Naive Bayes:** Probabilistic classification of disaster types  
+    - **Support Vector Machines (SVM):** Disaster category classification  
+    """)
+
+    st.info("""
+    These models help explore whether climate conditions
+    can meaningfully distinguish between different disaster categories.
+    """)
+
+    st.subheader("Training Results")
+    if not store.exists():
+        st.caption("No local dataset yet. Build it from the dashboard app to train the models.")
+    else:
+        job = training_worker().submit(store.manifest()["version"], load_model_frame)
+        if not job.done():
+            poll_training(job)
+        elif job.exception():
+            st.error(f"Training failed: {job.exception()}")
+        else:
+            show_models(job.result())
+
+    st.subheader("Hyperparameter Search")
+    if os.path.exists(LEADERBOARD):
+        leaderboard = pd.read_csv(LEADERBOARD)
+        st.dataframe(
+            leaderboard.style.format({
+                "balanced_accuracy": "{:.3f}", "balanced_accuracy_std": "{:.3f}",
+                "macro_f1": "{:.3f}", "wall_s": "{:.2f}", "cpu_s": "{:.2f}"
+            }),
+            hide_index=True, use_container_width=True
+        )
+        st.caption("Stratified k-fold scores per configuration, with wall-clock and CPU time summed over folds.")
+    else:
+        st.caption("Run `python -m climate_pipeline.search` to cross-validate the classifier grid.")
 
 # --------------------------------------------------
 # RESULTS
@@ -329,3 +446,9 @@ with tab6:
         """)
 
     st.success("🌱 Data-driven climate analysis can support disaster preparedness and mitigation.")
+
+
+# --------------------------------------------------
+# PERFORMANCE (hidden; open the app with ?perf=1)
+# --------------------------------------------------
+metrics.show_panel()